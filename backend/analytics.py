@@ -0,0 +1,525 @@
+# backend/analytics.py
+"""
+Optional in-memory columnar engine for the /reports handlers.
+
+Enable with ANALYTICS_MODE=columnar. On first use deposits, payments,
+transfers and payee accounts are loaded once into compact numpy columns
+(int32 ids/dates, int64 cents, dictionary-encoded source and category); the
+routers then apply their writes as deltas so the arrays stay current.
+
+Deltas only reach the process that handled the write, so columnar mode
+requires the API to run as a single process (one worker, one replica, with
+the scheduler in-process). claim() enforces this at startup: it refuses
+WEB_CONCURRENCY > 1 and, on Postgres, holds an advisory lock that a second
+columnar process fails to take. Writes made outside the API (psql, running
+interest_job.py by hand) are not seen until a restart.
+"""
+import os
+import threading
+import time
+import zlib
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select, text
+
+from models import Deposit, Payee, PayeeAccount, Payment, Transfer
+
+ANALYTICS_MODE = os.getenv("ANALYTICS_MODE", "sql")
+LOAD_CHUNK = 100_000
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+# Set by claim(): True, or on Postgres the connection holding the advisory lock
+_claim = None
+_CLAIM_LOCK_KEY = zlib.crc32(b"finance-analytics:columnar")
+
+
+def enabled():
+    return ANALYTICS_MODE == "columnar" and _claim is not None
+
+
+def claim(engine):
+    """
+    Called at startup. In columnar mode, make sure this is the only API process
+    or raise RuntimeError; other modes need nothing.
+    """
+    global _claim
+    if ANALYTICS_MODE != "columnar" or _claim is not None:
+        return
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        raise RuntimeError(f"ANALYTICS_MODE=columnar needs a single API process, WEB_CONCURRENCY is {workers}")
+    if engine.dialect.name != "postgresql":
+        _claim = True
+        return
+    # Session-level lock held for the life of the process on a dedicated connection
+    conn = engine.connect()
+    acquired = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _CLAIM_LOCK_KEY}).scalar()
+    conn.commit()
+    if not acquired:
+        conn.close()
+        raise RuntimeError("ANALYTICS_MODE=columnar needs a single API process, another one holds the analytics lock")
+    _claim = conn
+
+
+def release():
+    global _claim
+    if _claim is not None and _claim is not True:
+        # Returning the connection to the pool would keep the session, and the lock, alive
+        _claim.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _CLAIM_LOCK_KEY})
+        _claim.commit()
+        _claim.close()
+    _claim = None
+
+
+def _day(d):
+    return d.toordinal() - EPOCH
+
+
+def _cents(value):
+    return int(round(float(value or 0) * 100))
+
+
+class _Dictionary:
+    """Append-only string <-> int32 code mapping."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode_many(self, values):
+        return np.fromiter((self.encode(v) for v in values), dtype=np.int32, count=len(values))
+
+    def nbytes(self):
+        return sum(len(v) for v in self.values)
+
+
+class _Table:
+    """
+    Growable set of equal-length numpy columns kept sorted by "id".
+    Deletes are tombstones (valid=False), compacted once they pile up.
+    """
+
+    def __init__(self, **dtypes):
+        self.dtypes = {"id": np.int32, **dtypes}
+        self.n = 0
+        self.tombstones = 0
+        self.cols = {k: np.empty(1024, dtype=dt) for k, dt in self.dtypes.items()}
+        self.valid = np.empty(1024, dtype=bool)
+
+    def _reserve(self, extra):
+        need = self.n + extra
+        if need <= len(self.valid):
+            return
+        size = max(need, len(self.valid) * 2)
+        for k, col in self.cols.items():
+            grown = np.empty(size, dtype=col.dtype)
+            grown[:self.n] = col[:self.n]
+            self.cols[k] = grown
+        grown = np.empty(size, dtype=bool)
+        grown[:self.n] = self.valid[:self.n]
+        self.valid = grown
+
+    def extend(self, columns):
+        """Bulk append; rows must be in ascending id order and after the current last id."""
+        count = len(columns["id"])
+        self._reserve(count)
+        for k, col in self.cols.items():
+            col[self.n:self.n + count] = columns[k]
+        self.valid[self.n:self.n + count] = True
+        self.n += count
+
+    def _find(self, row_id):
+        ids = self.cols["id"][:self.n]
+        i = int(np.searchsorted(ids, row_id))
+        return i, (i < self.n and ids[i] == row_id)
+
+    def upsert(self, row_id, values):
+        i, found = self._find(row_id)
+        if not found:
+            if i < self.n:
+                # Out-of-order id (rare): shift the tail to keep ids sorted
+                self._reserve(1)
+                for col in self.cols.values():
+                    col[i + 1:self.n + 1] = col[i:self.n]
+                self.valid[i + 1:self.n + 1] = self.valid[i:self.n]
+            else:
+                self._reserve(1)
+            self.n += 1
+            self.cols["id"][i] = row_id
+        elif not self.valid[i]:
+            self.tombstones -= 1
+        for k, v in values.items():
+            self.cols[k][i] = v
+        self.valid[i] = True
+
+    def delete(self, row_id):
+        i, found = self._find(row_id)
+        if found and self.valid[i]:
+            self.valid[i] = False
+            self.tombstones += 1
+            if self.tombstones > max(1024, self.n // 4):
+                self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.valid[:self.n])
+        for k, col in self.cols.items():
+            col[:len(keep)] = col[keep]
+        self.valid[:len(keep)] = True
+        self.n = len(keep)
+        self.tombstones = 0
+
+    def live(self):
+        """(columns, mask) views over the used rows; callers must not modify them in place."""
+        return {k: col[:self.n] for k, col in self.cols.items()}, self.valid[:self.n]
+
+    def rows(self):
+        return self.n - self.tombstones
+
+    def nbytes(self):
+        return sum(col[:self.n].nbytes for col in self.cols.values()) + self.valid[:self.n].nbytes
+
+
+_SCHEMAS = {
+    "deposits": dict(account_id=np.int32, user_id=np.int32, date=np.int32, amount=np.int64, source=np.int32),
+    "payments": dict(checking_account_id=np.int32, payee_account_id=np.int32, user_id=np.int32,
+                     date=np.int32, amount=np.int64),
+    "transfers": dict(from_account_id=np.int32, to_account_id=np.int32, user_id=np.int32,
+                      to_user_id=np.int32, date=np.int32, amount=np.int64),
+    "payee_accounts": dict(payee_id=np.int32, user_id=np.int32, category=np.int32, current_balance=np.int64),
+}
+
+# Columns stored as codes into the store's dictionaries
+_ENCODED = {"source": "sources", "category": "categories"}
+
+
+def _encode(values, dictionaries):
+    """Copy of a delta's values with dictionary-encoded columns replaced by their codes."""
+    return {k: dictionaries[_ENCODED[k]].encode(v) if k in _ENCODED else v for k, v in values.items()}
+
+
+def _date_mask(mask, dates, start_date, end_date):
+    if start_date:
+        mask = mask & (dates >= _day(start_date))
+    if end_date:
+        mask = mask & (dates <= _day(end_date))
+    return mask
+
+
+class ColumnarStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Serializes loads; never held together with a write delta
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at = None
+        self.load_seconds = None
+        self._stale_payee_accounts = False
+        # Bumped by full invalidations; a load that straddles one is not marked loaded
+        self._generation = 0
+        # {table: [(row_id, values or None for delete)]} while a load is running
+        self._pending = None
+        self.tables = {name: _Table(**schema) for name, schema in _SCHEMAS.items()}
+        self.sources = _Dictionary()
+        self.categories = _Dictionary()
+
+    def _dictionaries(self):
+        return {"sources": self.sources, "categories": self.categories}
+
+    # ---------- Loading ----------
+    def ensure_loaded(self, db):
+        """
+        Load (or reload stale payee accounts) into fresh tables outside _lock and
+        swap them in. Writes during the load still apply to the current tables and
+        are queued, then replayed onto the new ones, so they never wait on a load.
+        """
+        with self._lock:
+            if self.loaded and not self._stale_payee_accounts:
+                return self
+        with self._load_lock:
+            with self._lock:
+                if not self.loaded:
+                    names = list(_SCHEMAS)
+                elif self._stale_payee_accounts:
+                    names = ["payee_accounts"]
+                else:
+                    # Another request finished the load while this one waited
+                    return self
+                self._pending = {name: [] for name in names}
+                self._stale_payee_accounts = False
+                generation = self._generation
+            started = time.perf_counter()
+            tables = {name: _Table(**_SCHEMAS[name]) for name in names}
+            dictionaries = {"sources": _Dictionary(), "categories": _Dictionary()}
+            try:
+                self._load_tables(db, tables, dictionaries)
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                    self._stale_payee_accounts = self._stale_payee_accounts or self.loaded
+                raise
+            with self._lock:
+                for name, changes in self._pending.items():
+                    for row_id, values in changes:
+                        if values is None:
+                            tables[name].delete(row_id)
+                        else:
+                            tables[name].upsert(row_id, _encode(values, dictionaries))
+                self._pending = None
+                self.tables.update(tables)
+                if "deposits" in tables:
+                    self.sources = dictionaries["sources"]
+                if "payee_accounts" in tables:
+                    self.categories = dictionaries["categories"]
+                if len(names) > 1:
+                    # If invalidate() ran during the load this data may predate it: serve it, reload next time
+                    self.loaded = generation == self._generation
+                    self.loaded_at = time.time()
+                    self.load_seconds = time.perf_counter() - started
+        return self
+
+    def _load(self, db, table, stmt, convert):
+        # Core execution: plain tuples, no ORM row processing
+        result = db.connection().execute(
+            stmt.order_by(stmt.selected_columns[0]).execution_options(yield_per=LOAD_CHUNK)
+        )
+        for part in result.partitions():
+            table.extend(convert(list(zip(*part))))
+
+    def _load_tables(self, db, tables, dictionaries):
+        def dates(values):
+            return np.fromiter((_day(d) for d in values), dtype=np.int32, count=len(values))
+
+        def cents(values):
+            return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+        if "deposits" in tables:
+            self._load(db, tables["deposits"], select(
+                Deposit.id, Deposit.account_id, Deposit.user_id, Deposit.date, Deposit.amount, Deposit.source
+            ), lambda c: {"id": c[0], "account_id": c[1], "user_id": c[2], "date": dates(c[3]),
+                          "amount": cents(c[4]), "source": dictionaries["sources"].encode_many(c[5])})
+        if "payments" in tables:
+            self._load(db, tables["payments"], select(
+                Payment.id, Payment.checking_account_id, Payment.payee_account_id, Payment.user_id, Payment.date,
+                Payment.amount
+            ), lambda c: {"id": c[0], "checking_account_id": c[1], "payee_account_id": c[2], "user_id": c[3],
+                          "date": dates(c[4]), "amount": cents(c[5])})
+        if "transfers" in tables:
+            self._load(db, tables["transfers"], select(
+                Transfer.id, Transfer.from_account_id, Transfer.to_account_id, Transfer.user_id, Transfer.to_user_id,
+                Transfer.date, Transfer.amount
+            ), lambda c: {"id": c[0], "from_account_id": c[1], "to_account_id": c[2], "user_id": c[3],
+                          "to_user_id": c[4], "date": dates(c[5]), "amount": cents(c[6])})
+        if "payee_accounts" in tables:
+            self._load(db, tables["payee_accounts"], select(
+                PayeeAccount.id, PayeeAccount.payee_id, Payee.user_id, PayeeAccount.category,
+                PayeeAccount.current_balance
+            ).join(Payee, Payee.id == PayeeAccount.payee_id),
+                lambda c: {"id": c[0], "payee_id": c[1], "user_id": c[2],
+                           "category": dictionaries["categories"].encode_many(c[3]),
+                           "current_balance": cents(c[4])})
+
+    # ---------- Write deltas ----------
+    def upsert(self, table, row_id, values):
+        with self._lock:
+            if self._pending is not None and table in self._pending:
+                self._pending[table].append((row_id, values))
+            if self.loaded:
+                self.tables[table].upsert(row_id, _encode(values, self._dictionaries()))
+
+    def delete(self, table, row_id):
+        with self._lock:
+            if self._pending is not None and table in self._pending:
+                self._pending[table].append((row_id, None))
+            if self.loaded:
+                self.tables[table].delete(row_id)
+
+    def invalidate(self, table=None):
+        with self._lock:
+            if table == "payee_accounts":
+                self._stale_payee_accounts = True
+            else:
+                self._generation += 1
+                self.loaded = False
+
+    # ---------- Reports ----------
+    def deposits_by_source(self, start_date=None, end_date=None, account_id=None, user_id=None):
+        with self._lock:
+            c, mask = self.tables["deposits"].live()
+            mask = _date_mask(mask, c["date"], start_date, end_date)
+            if account_id:
+                mask = mask & (c["account_id"] == account_id)
+            if user_id is not None:
+                mask = mask & (c["user_id"] == user_id)
+            codes, cents = c["source"][mask], c["amount"][mask]
+            values = list(self.sources.values)
+
+        counts = np.bincount(codes, minlength=len(values))
+        totals = np.bincount(codes, weights=cents, minlength=len(values))
+        # Largest total first, ties by source like the SQL path
+        order = sorted(np.flatnonzero(counts).tolist(), key=lambda k: (-totals[k], values[k]))
+        return [
+            {"source": values[k], "count": int(counts[k]), "total_amount": float(totals[k]) / 100}
+            for k in order
+        ]
+
+    def payee_balances_summary(self, user_id=None):
+        with self._lock:
+            c, mask = self.tables["payee_accounts"].live()
+            if user_id is not None:
+                mask = mask & (c["user_id"] == user_id)
+            payee_ids, categories, cents = c["payee_id"][mask], c["category"][mask], c["current_balance"][mask]
+            values = list(self.categories.values)
+
+        uniq, inverse = np.unique(payee_ids, return_inverse=True)
+        by_payee = np.bincount(inverse, weights=cents, minlength=len(uniq))
+        cat_counts = np.bincount(categories, minlength=len(values))
+        by_category = np.bincount(categories, weights=cents, minlength=len(values))
+        return {
+            "by_payee": [{"payee_id": int(pid), "total_balance": float(total) / 100} for pid, total in zip(uniq, by_payee)],
+            "by_category": [
+                {"category": values[k], "total_balance": float(by_category[k]) / 100}
+                for k in sorted(np.flatnonzero(cat_counts).tolist(), key=values.__getitem__)
+            ],
+        }
+
+    def payments_history(self, payee_account_id=None, start_date=None, end_date=None, user_id=None):
+        with self._lock:
+            c, mask = self.tables["payments"].live()
+            if user_id is not None:
+                mask = mask & (c["user_id"] == user_id)
+            if payee_account_id:
+                mask = mask & (c["payee_account_id"] == payee_account_id)
+            mask = _date_mask(mask, c["date"], start_date, end_date)
+            idx = np.flatnonzero(mask)
+            # Newest first, ties by id like the SQL path
+            idx = idx[np.lexsort((-c["id"][idx], -c["date"][idx]))]
+            ids, dates = c["id"][idx].tolist(), c["date"][idx].tolist()
+            cents = c["amount"][idx].tolist()
+            payee_accounts = c["payee_account_id"][idx].tolist()
+            checking = c["checking_account_id"][idx].tolist()
+
+        day_cache = {}
+        return [
+            {
+                "id": ids[i],
+                "date": day_cache.setdefault(dates[i], date.fromordinal(dates[i] + EPOCH)),
+                "amount": cents[i] / 100,
+                "payee_account_id": payee_accounts[i],
+                "checking_account_id": checking[i],
+            } for i in range(len(ids))
+        ]
+
+    def cashflow_monthly(self, year=None, user_id=None):
+        def monthly(table):
+            c, mask = self.tables[table].live()
+            if user_id is not None:
+                mask = mask & (c["user_id"] == user_id)
+            months = c["date"][mask].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            cents = c["amount"][mask]
+            if year:
+                keep = months // 12 + 1970 == year
+                months, cents = months[keep], cents[keep]
+            if not months.size:
+                return {}
+            lo = int(months.min())
+            counts = np.bincount(months - lo)
+            totals = np.bincount(months - lo, weights=cents)
+            return {
+                divmod(lo + int(k), 12): float(totals[k]) / 100
+                for k in np.flatnonzero(counts)
+            }
+
+        with self._lock:
+            deposits = monthly("deposits")
+            payments = monthly("payments")
+
+        result = []
+        for (y, m0) in sorted(set(deposits) | set(payments)):
+            inflow = deposits.get((y, m0), 0.0)
+            outflow = payments.get((y, m0), 0.0)
+            result.append({
+                "year": y + 1970,
+                "month": m0 + 1,
+                "inflow": inflow,
+                "outflow": outflow,
+                "net": inflow - outflow
+            })
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": ANALYTICS_MODE,
+                "loaded": self.loaded,
+                "loading": self._pending is not None,
+                "single_process_claimed": _claim is not None,
+                "load_seconds": self.load_seconds,
+                "tables": {
+                    name: {"rows": t.rows(), "tombstones": t.tombstones, "nbytes": t.nbytes()}
+                    for name, t in self.tables.items()
+                },
+                "dictionaries": {
+                    "source": {"entries": len(self.sources.values), "bytes": self.sources.nbytes()},
+                    "category": {"entries": len(self.categories.values), "bytes": self.categories.nbytes()},
+                },
+            }
+
+
+store = ColumnarStore()
+
+
+def get_store(db):
+    return store.ensure_loaded(db)
+
+
+# ---------- Router hooks (no-ops unless the columnar mode is enabled and loaded) ----------
+def record_deposit(dep):
+    if enabled():
+        store.upsert("deposits", dep.id, {
+            "account_id": dep.account_id, "user_id": dep.user_id, "date": _day(dep.date),
+            "amount": _cents(dep.amount), "source": dep.source,
+        })
+
+
+def record_payment(pay):
+    if enabled():
+        store.upsert("payments", pay.id, {
+            "checking_account_id": pay.checking_account_id, "payee_account_id": pay.payee_account_id,
+            "user_id": pay.user_id, "date": _day(pay.date), "amount": _cents(pay.amount),
+        })
+
+
+def record_transfer(t):
+    if enabled():
+        store.upsert("transfers", t.id, {
+            "from_account_id": t.from_account_id, "to_account_id": t.to_account_id,
+            "user_id": t.user_id, "to_user_id": t.to_user_id, "date": _day(t.date), "amount": _cents(t.amount),
+        })
+
+
+def record_payee_account(pa, user_id):
+    if enabled():
+        store.upsert("payee_accounts", pa.id, {
+            "payee_id": pa.payee_id, "user_id": user_id or 0,
+            "category": pa.category, "current_balance": _cents(pa.current_balance),
+        })
+
+
+def forget(table, row_id):
+    if enabled():
+        store.delete(table, row_id)
+
+
+def invalidate(table=None):
+    """Reload `table` (only "payee_accounts" is reloaded alone) or everything on next use."""
+    if enabled():
+        store.invalidate(table)
@@ -0,0 +1,146 @@
+# benchmarks/columnar_reports.py
+"""
+Report latency and memory: SQL (SQLite) vs the in-memory columnar engine.
+
+Seeds `--rows` transaction rows (70% deposits, 25% payments, 5% transfers)
+into a SQLite file, loads them into analytics.ColumnarStore and times the
+four reports it serves, unscoped and per user:
+
+    cd backend && python benchmarks/columnar_reports.py --rows 10000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+import analytics
+import models
+from routers import reports
+
+BATCH = 100_000
+
+
+def seed(engine, rows, users):
+    random.seed(7)
+    start = date(2021, 1, 1)
+    accounts = users * 2
+    payee_accounts = users * 3
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": u, "name": f"user {u}", "email": f"u{u}@example.com"} for u in range(1, users + 1)])
+        conn.execute(insert(models.Account), [
+            {"id": a, "user_id": (a - 1) // 2 + 1, "type": "checking", "nickname": f"acct {a}"} for a in range(1, accounts + 1)
+        ])
+        conn.execute(insert(models.Payee), [{"id": u, "user_id": u, "name": f"payee {u}"} for u in range(1, users + 1)])
+        conn.execute(insert(models.PayeeAccount), [
+            {"id": p, "payee_id": (p - 1) // 3 + 1, "account_label": f"pa {p}",
+             "category": random.choice(["utilities", "loan", "credit", "insurance"]),
+             "current_balance": round(random.uniform(0, 10000), 2)}
+            for p in range(1, payee_accounts + 1)
+        ])
+
+        def insert_many(model, n, make):
+            for lo in range(0, n, BATCH):
+                conn.execute(insert(model), [make() for _ in range(min(BATCH, n - lo))])
+
+        def day():
+            return start + timedelta(days=random.randrange(1500))
+
+        def account():
+            a = random.randint(1, accounts)
+            return a, (a - 1) // 2 + 1
+
+        def deposit():
+            a, u = account()
+            return {"account_id": a, "user_id": u, "source": f"source {random.randint(1, 200)}",
+                    "amount": round(random.uniform(10, 5000), 2), "date": day()}
+
+        def payment():
+            a, u = account()
+            return {"checking_account_id": a, "user_id": u, "payee_account_id": (u - 1) * 3 + random.randint(1, 3),
+                    "amount": round(random.uniform(10, 2000), 2), "date": day()}
+
+        def transfer():
+            a, u = account()
+            return {"from_account_id": a, "to_account_id": a + 1 if a % 2 else a - 1, "user_id": u, "to_user_id": u,
+                    "amount": round(random.uniform(10, 1000), 2), "date": day()}
+
+        insert_many(models.Deposit, rows * 70 // 100, deposit)
+        insert_many(models.Payment, rows * 25 // 100, payment)
+        insert_many(models.Transfer, rows - rows * 95 // 100, transfer)
+        conn.execute(text("ANALYZE"))
+
+
+def timed(label, repeat, fn):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - t0) / repeat
+    print(f"{label:<50} {elapsed * 1e3:10.2f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "columnar_reports.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    t0 = time.perf_counter()
+    seed(engine, args.rows, args.users)
+    print(f"seeded {args.rows} transactions in {time.perf_counter() - t0:.1f}s")
+
+    store = analytics.ColumnarStore()
+    uid = args.users // 2
+    cases = [
+        ("deposits_by_source",
+         lambda db: reports.deposits_by_source(db=db, start_date=None, end_date=None, account_id=None, user_id=None),
+         lambda: store.deposits_by_source()),
+        ("deposits_by_source (user)",
+         lambda db: reports.deposits_by_source(db=db, start_date=None, end_date=None, account_id=None, user_id=uid),
+         lambda: store.deposits_by_source(user_id=uid)),
+        ("payee_balances_summary",
+         lambda db: reports.payee_balances_summary(db=db, user_id=None),
+         lambda: store.payee_balances_summary()),
+        ("payments_history (user)",
+         lambda db: reports.payments_history(db=db, payee_account_id=None, start_date=None, end_date=None, user_id=uid),
+         lambda: store.payments_history(user_id=uid)),
+        ("cashflow_monthly",
+         lambda db: reports.cashflow_monthly(db=db, year=None, user_id=None),
+         lambda: store.cashflow_monthly()),
+        ("cashflow_monthly (user, 2022)",
+         lambda db: reports.cashflow_monthly(db=db, year=2022, user_id=uid),
+         lambda: store.cashflow_monthly(year=2022, user_id=uid)),
+    ]
+
+    with Session(engine) as db:
+        t0 = time.perf_counter()
+        store.ensure_loaded(db)
+        print(f"columnar load                                      {time.perf_counter() - t0:10.2f} s")
+
+        analytics.ANALYTICS_MODE = "sql"
+        for label, sql, columnar in cases:
+            sql_s = timed(f"sql       {label}", args.repeat, lambda: sql(db))
+            col_s = timed(f"columnar  {label}", args.repeat, columnar)
+            print(f"{'':<50} {sql_s / col_s:9.1f}x")
+
+    stats = store.stats()
+    resident = sum(t["nbytes"] for t in stats["tables"].values()) + sum(d["bytes"] for d in stats["dictionaries"].values())
+    print(f"sqlite file                                        {os.path.getsize(path) / 2**20:10.1f} MiB")
+    print(f"columnar arrays + dictionaries                     {resident / 2**20:10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/forecast_projection.py
+"""
+Latency of forecast.project() for many checking accounts over a long horizon.
+
+Seeds weekly/biweekly/monthly deposit streams and monthly bills per account
+into an in-memory SQLite database:
+
+    cd backend && python benchmarks/forecast_projection.py --accounts 5000 --days 365
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+import forecast
+import models
+
+
+def seed(engine, n_accounts, today):
+    random.seed(5)
+    deposits, payee_accounts, payments = [], [], []
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": i, "name": f"u{i}", "email": f"u{i}@example.com"} for i in range(1, n_accounts + 1)])
+        conn.execute(insert(models.Account), [
+            {"id": i, "user_id": i, "type": "checking", "nickname": f"acct {i}", "balance": random.uniform(-200, 3000)}
+            for i in range(1, n_accounts + 1)
+        ])
+        conn.execute(insert(models.Payee), [{"id": i, "user_id": i, "name": f"payee {i}"} for i in range(1, n_accounts + 1)])
+        for acct in range(1, n_accounts + 1):
+            for source, cadence, amount in (("payroll", 14, 2100.0), ("side gig", 7, 150.0), ("rent in", 30, 900.0)):
+                last = today - timedelta(days=random.randint(0, cadence - 1))
+                for k in range(6):
+                    deposits.append({"account_id": acct, "user_id": acct, "source": source,
+                                     "amount": amount * random.uniform(0.95, 1.05), "date": last - timedelta(days=cadence * k)})
+            for b in range(2):
+                pa_id = (acct - 1) * 2 + b + 1
+                payee_accounts.append({"id": pa_id, "payee_id": acct, "account_label": f"bill {b}", "category": "utilities",
+                                       "current_balance": random.uniform(50, 2500), "due_date": today + timedelta(days=random.randint(0, 30))})
+                payments.append({"checking_account_id": acct, "payee_account_id": pa_id, "user_id": acct,
+                                 "amount": random.uniform(50, 800), "date": today - timedelta(days=random.randint(1, 60))})
+        conn.execute(insert(models.Deposit), deposits)
+        conn.execute(insert(models.PayeeAccount), payee_accounts)
+        conn.execute(insert(models.Payment), payments)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    today = date.today()
+    seed(engine, args.accounts, today)
+
+    with Session(engine) as db:
+        timings = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            out = forecast.project(db, args.days, today=today)
+            timings.append(time.perf_counter() - t0)
+    flagged = sum(1 for a in out["accounts"] if a["goes_negative_on"])
+    print(f"{args.accounts} accounts x {args.days} days: best {min(timings) * 1e3:.0f} ms, "
+          f"median {sorted(timings)[len(timings) // 2] * 1e3:.0f} ms; "
+          f"{len(out['recurring_deposits'])} recurring streams, {flagged} accounts go negative")
+
+
+if __name__ == "__main__":
+    main()
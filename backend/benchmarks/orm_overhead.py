@@ -0,0 +1,105 @@
+# benchmarks/orm_overhead.py
+"""
+Per-request ORM overhead: the legacy db.query(...) constructs vs the cached
+statements in queries.py and the lambda statements in routers/reports.py.
+
+Runs against an in-memory SQLite database so the numbers are dominated by
+statement construction/compilation rather than I/O:
+
+    cd backend && python benchmarks/orm_overhead.py --rows 2000 --iterations 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import models
+import queries
+from routers import reports
+
+
+def seed(session, rows):
+    random.seed(7)
+    session.add(models.User(id=1, name="bench", email="bench@example.com"))
+    session.add_all(models.Account(id=i, user_id=1, type="checking", nickname=f"acct {i}") for i in range(1, 51))
+    start = date(2024, 1, 1)
+    session.add_all(
+        models.Deposit(
+            account_id=random.randint(1, 50),
+            user_id=1,
+            source=f"source {random.randint(1, 200)}",
+            amount=round(random.uniform(10, 5000), 2),
+            date=start + timedelta(days=random.randint(0, 700)),
+        ) for _ in range(rows)
+    )
+    session.commit()
+
+
+def legacy_get(db, account_id):
+    return db.query(models.Account).filter(models.Account.id == account_id).first()
+
+
+def legacy_deposits_by_source(db, start_date, end_date, account_id):
+    q = db.query(
+        models.Deposit.source,
+        func.count(models.Deposit.id).label("count"),
+        func.sum(models.Deposit.amount).label("total_amount"),
+    )
+    if start_date:
+        q = q.filter(models.Deposit.date >= start_date)
+    if end_date:
+        q = q.filter(models.Deposit.date <= end_date)
+    if account_id:
+        q = q.filter(models.Deposit.account_id == account_id)
+    return q.group_by(models.Deposit.source).order_by(func.sum(models.Deposit.amount).desc()).all()
+
+
+def timed(label, iterations, fn):
+    before = queries.statement_cache_stats.snapshot()
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    per_call = (time.perf_counter() - t0) / iterations * 1e6
+    after = queries.statement_cache_stats.snapshot()
+    hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+    print(f"{label:<40} {per_call:9.1f} us/call   cache hits={hits} misses={misses}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    queries.install_statement_cache_stats(engine)
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        seed(db, args.rows)
+
+    n = args.iterations
+    start, end = date(2024, 3, 1), date(2024, 9, 30)
+    with Session(engine) as db:
+        # Expire between calls so the identity map does not short-circuit the lookups
+        timed("CRUD get-by-id, db.query().filter()", n, lambda i: (legacy_get(db, i % 50 + 1), db.expire_all()))
+        timed("CRUD get-by-id, queries.get_by_id", n, lambda i: (queries.get_by_id(db, models.Account, i % 50 + 1), db.expire_all()))
+
+        report_n = max(n // 20, 1)
+        timed("deposits-by-source, db.query()", report_n,
+              lambda i: legacy_deposits_by_source(db, start, end, i % 50 + 1))
+        timed("deposits-by-source, lambda_stmt", report_n,
+              lambda i: reports.deposits_by_source(db=db, start_date=start, end_date=end, account_id=i % 50 + 1))
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/search_fallback.py
+"""
+Latency of the in-memory search fallback (search_index.PrefixIndex) over
+realistic multi-word names:
+
+    cd backend && python benchmarks/search_fallback.py --entries 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search_index import PrefixIndex
+
+FIRST = ["acme", "first", "national", "citizens", "united", "american", "pacific", "community", "federal",
+         "green", "summit", "river", "metro", "liberty", "heritage", "pioneer", "capital", "golden", "northern",
+         "coastal", "mountain", "valley", "lake", "harbor", "union", "state", "city", "county", "global", "prime"]
+MIDDLE = ["bank", "credit", "energy", "water", "power", "gas", "telecom", "wireless", "insurance", "mortgage",
+          "auto", "health", "medical", "dental", "student", "home", "cable", "internet", "fitness", "storage"]
+LAST = ["corp", "inc", "llc", "union", "services", "group", "company", "partners", "co", "association",
+        "payroll", "finance", "lending", "loans", "utilities", "systems", "holdings", "trust", "mutual", "plc"]
+QUERIES = {
+    "prefix": ["a", "ac", "acme", "first nat", "pacific gas", "zz"],
+    "fuzzy": ["acme", "bank corp", "credt unon", "pacfic gas electrc", "nationl bank", "xyzzy"],
+}
+
+
+def names(n):
+    random.seed(5)
+    out = set()
+    while len(out) < n:
+        words = [random.choice(FIRST), random.choice(MIDDLE), random.choice(LAST)]
+        if random.random() < 0.5:
+            words.insert(1, random.choice(FIRST))
+        out.add(" ".join(words).title() + f" {random.randint(1, 9999)}" * (random.random() < 0.7))
+    return sorted(out)
+
+
+def timed(label, repeat, fn):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"{label:<40} {(time.perf_counter() - t0) / repeat * 1e3:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = names(args.entries)
+    t0 = time.perf_counter()
+    index = PrefixIndex()
+    for i, name in enumerate(entries):
+        index.add(name, {"id": i, "name": name})
+    print(f"built {index.size()} entries in {time.perf_counter() - t0:.2f}s")
+
+    for q in QUERIES["prefix"]:
+        timed(f"prefix {q!r}", args.repeat, lambda: index.prefix(q, 20))
+    for q in QUERIES["fuzzy"]:
+        timed(f"fuzzy  {q!r}", args.repeat, lambda: index.fuzzy(q, 20))
+
+    victims = random.sample(range(len(entries)), 1000)
+    t0 = time.perf_counter()
+    for i in victims:
+        index.remove(entries[i], {"id": i, "name": entries[i]})
+    print(f"{'remove (per entry)':<40} {(time.perf_counter() - t0) / len(victims) * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/user_scoping.py
+"""
+Per-user query latency: joining through accounts vs the denormalized
+(user_id, date, id) index on the transaction tables.
+
+Seeds 10k users into a SQLite file (indexes mirror init.sql) and times the
+most recent N deposits for random users, plus the scoped deposits-by-source
+report:
+
+    cd backend && python benchmarks/user_scoping.py --users 10000 --deposits-per-user 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import bindparam, create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+import models
+from routers import reports
+
+
+def seed(engine, users, accounts_per_user, deposits_per_user):
+    random.seed(11)
+    start = date(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": u, "name": f"user {u}", "email": f"u{u}@example.com"} for u in range(1, users + 1)])
+        accounts = [
+            {"id": (u - 1) * accounts_per_user + k + 1, "user_id": u, "type": "checking", "nickname": f"acct {k}"}
+            for u in range(1, users + 1) for k in range(accounts_per_user)
+        ]
+        conn.execute(insert(models.Account), accounts)
+        batch = []
+        for u in range(1, users + 1):
+            for _ in range(deposits_per_user):
+                batch.append({
+                    "account_id": (u - 1) * accounts_per_user + random.randrange(accounts_per_user) + 1,
+                    "user_id": u,
+                    "source": f"source {random.randint(1, 50)}",
+                    "amount": round(random.uniform(10, 5000), 2),
+                    "date": start + timedelta(days=random.randint(0, 1000)),
+                })
+            if len(batch) >= 50000:
+                conn.execute(insert(models.Deposit), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Deposit), batch)
+        # Indexes that init.sql declares but models.py does not
+        conn.execute(text("CREATE INDEX idx_accounts_user_id ON accounts(user_id)"))
+        conn.execute(text("CREATE INDEX idx_deposits_account_id ON deposits(account_id)"))
+        conn.execute(text("ANALYZE"))
+
+
+def timed(label, samples, fn):
+    t0 = time.perf_counter()
+    for uid in samples:
+        fn(uid)
+    print(f"{label:<45} {(time.perf_counter() - t0) / len(samples) * 1e3:8.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--accounts-per-user", type=int, default=3)
+    parser.add_argument("--deposits-per-user", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "user_scoping.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    t0 = time.perf_counter()
+    seed(engine, args.users, args.accounts_per_user, args.deposits_per_user)
+    print(f"seeded {args.users} users / {args.users * args.deposits_per_user} deposits in {time.perf_counter() - t0:.1f}s")
+
+    random.seed(3)
+    samples = [random.randint(1, args.users) for _ in range(args.samples)]
+    D, A = models.Deposit, models.Account
+    via_join = (
+        select(D).join(A, A.id == D.account_id)
+        .where(A.user_id == bindparam("uid")).order_by(D.date.desc(), D.id.desc()).limit(args.limit)
+    )
+    via_user_id = select(D).where(D.user_id == bindparam("uid")).order_by(D.date.desc(), D.id.desc()).limit(args.limit)
+
+    with Session(engine) as db:
+        timed("latest deposits, join through accounts", samples,
+              lambda uid: db.execute(via_join, {"uid": uid}).scalars().all())
+        timed("latest deposits, deposits.user_id index", samples,
+              lambda uid: db.execute(via_user_id, {"uid": uid}).scalars().all())
+        timed("deposits-by-source report, user-scoped", samples,
+              lambda uid: reports.deposits_by_source(db=db, start_date=None, end_date=None, account_id=None, user_id=uid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# backend/cache.py
+"""
+Process-local reference caches. invalidate() only reaches the process that
+handled the write: with several workers or replicas, the others keep serving
+the old names and labels until LRU eviction or a restart.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from models import Payee, PayeeAccount
+
+# Upper bound on entries kept per cache; least recently used entries are evicted first
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "10000"))
+
+
+class ReferenceCache:
+    """
+    Process-wide LRU cache for read-mostly reference rows.
+    Entries are plain dicts (not ORM instances) so they can be shared
+    across sessions and threads. Writers must call invalidate().
+    """
+
+    def __init__(self, name, loader, maxsize=REFERENCE_CACHE_SIZE):
+        self.name = name
+        self._loader = loader
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; loads that straddle one are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, key):
+        return self.get_many(db, [key]).get(key)
+
+    def get_many(self, db, keys):
+        """
+        Return {key: entry} for the given keys, loading all misses
+        with a single query. Keys that do not exist are omitted.
+        """
+        found, missing = {}, []
+        with self._lock:
+            for key in set(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if missing:
+            loaded = self._loader(db, missing)
+            with self._lock:
+                # If an invalidate() ran during the SELECT the rows may predate it; return them uncached
+                if generation == self._generation:
+                    for key, entry in loaded.items():
+                        self._entries[key] = entry
+                        self._entries.move_to_end(key)
+                    while len(self._entries) > self._maxsize:
+                        self._entries.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        with self._lock:
+            self._generation += 1
+            stale = [k for k, entry in self._entries.items() if predicate(entry)]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+def _load_payees(db, ids):
+    rows = db.query(Payee.id, Payee.user_id, Payee.name).filter(Payee.id.in_(ids)).all()
+    return {r.id: {"id": r.id, "user_id": r.user_id, "name": r.name} for r in rows}
+
+
+def _load_payee_accounts(db, ids):
+    rows = db.query(
+        PayeeAccount.id,
+        PayeeAccount.payee_id,
+        PayeeAccount.account_label,
+        PayeeAccount.category,
+        PayeeAccount.interest_type,
+        PayeeAccount.interest_rate,
+    ).filter(PayeeAccount.id.in_(ids)).all()
+    return {
+        r.id: {
+            "id": r.id,
+            "payee_id": r.payee_id,
+            "account_label": r.account_label,
+            "category": r.category,
+            "interest_type": r.interest_type,
+            "interest_rate": float(r.interest_rate or 0.0),
+        } for r in rows
+    }
+
+
+# Only metadata lives here; balances change on every payment and are always read from the DB
+payees = ReferenceCache("payees", _load_payees)
+payee_accounts = ReferenceCache("payee_accounts", _load_payee_accounts)
+
+
+def cache_stats():
+    return [payees.stats(), payee_accounts.stats()]
@@ -0,0 +1,288 @@
+# backend/forecast.py
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import func, select
+
+from models import Account, Deposit, Payee, PayeeAccount, Payment
+
+# Recurring deposit detection
+LOOKBACK_DAYS = 180
+MIN_OCCURRENCES = 3
+AMOUNT_SPREAD = 0.20            # max amount may exceed min amount by at most 20%
+CADENCES = (7, 14, 30)          # weekly, biweekly, monthly (monthly steps by calendar month)
+CADENCE_TOLERANCE = 0.15        # every gap within 15% of the cadence
+STALE_AFTER_CADENCES = 1.5      # a stream whose last deposit is older than 1.5 cadences has stopped
+
+
+def _cents(value):
+    return int(round(float(value or 0) * 100))
+
+
+def _add_months(d, months, day):
+    month_index = d.year * 12 + d.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_first = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day, (next_first - timedelta(days=1)).day))
+
+
+@lru_cache(maxsize=8)
+def _monthly_table(today, horizon):
+    """
+    For each day-of-month 1..31, the day offsets from today (month before
+    today .. horizon) of that day in every month, clamped to the month's end.
+    """
+    table = {}
+    first = _add_months(today, -1, 1)
+    for day in range(1, 32):
+        offsets = []
+        k = 0
+        while True:
+            offset = (_add_months(first, k, day) - today).days
+            if offset > horizon:
+                break
+            offsets.append(offset)
+            k += 1
+        table[day] = np.array(offsets, dtype=np.int64)
+    return table
+
+
+def _monthly_offsets(today, anchor, horizon, include_today):
+    """Day offsets in (0|1)..horizon of monthly occurrences on anchor's day-of-month, never before anchor."""
+    offsets = _monthly_table(today, horizon)[anchor.day]
+    # A future anchor (e.g. the stored next due date) is the first occurrence
+    lowest = max(0 if include_today else 1, (anchor - today).days)
+    return offsets[offsets >= lowest]
+
+
+def _near(gap, cadence):
+    return abs(gap - cadence) <= cadence * CADENCE_TOLERANCE + (0.5 if cadence == 30 else 0)
+
+
+def _match_cadence(avg_gap):
+    for cadence in CADENCES:
+        if _near(avg_gap, cadence):
+            return cadence
+    return None
+
+
+def _day_number(db, column):
+    # Postgres subtracts dates natively; SQLite stores them as text
+    return func.julianday(column) if db.bind.dialect.name == "sqlite" else column
+
+
+def detect_recurring_deposits(db, today, user_id=None):
+    """
+    Single grouped pass over recent deposits: a (account, source) pair is
+    recurring when it has enough occurrences, a stable amount, every gap
+    between consecutive deposits close to a known cadence, and a last deposit
+    no more than STALE_AFTER_CADENCES cadences ago. The gaps come from a
+    lag() window in the same query, so only their extremes reach Python.
+    """
+    day = _day_number(db, Deposit.date)
+    recent = (
+        select(
+            Deposit.id,
+            Deposit.account_id,
+            Deposit.source,
+            Deposit.date,
+            Deposit.amount,
+            (day - func.lag(day).over(partition_by=(Deposit.account_id, Deposit.source), order_by=Deposit.date))
+            .label("gap"),
+        )
+        .join(Account, Account.id == Deposit.account_id)
+        .where(Account.type == "checking")
+        .where(Deposit.date > today - timedelta(days=LOOKBACK_DAYS), Deposit.date <= today)
+    )
+    if user_id is not None:
+        recent = recent.where(Deposit.user_id == user_id)
+    recent = recent.subquery()
+    stmt = (
+        select(
+            recent.c.account_id,
+            recent.c.source,
+            func.count(recent.c.id),
+            func.min(recent.c.date),
+            func.max(recent.c.date),
+            func.min(recent.c.amount),
+            func.max(recent.c.amount),
+            func.avg(recent.c.amount),
+            func.min(recent.c.gap),
+            func.max(recent.c.gap),
+        )
+        .group_by(recent.c.account_id, recent.c.source)
+        .having(func.count(recent.c.id) >= MIN_OCCURRENCES)
+    )
+
+    recurring = []
+    for account_id, source, n, first, last, lo, hi, avg, min_gap, max_gap in db.execute(stmt):
+        if lo <= 0 or hi > lo * (1 + AMOUNT_SPREAD):
+            continue
+        cadence = _match_cadence((last - first).days / (n - 1))
+        # The average alone accepts e.g. days 0, 1 and 28 as biweekly
+        if cadence is None or not (_near(min_gap, cadence) and _near(max_gap, cadence)):
+            continue
+        # Projecting a stream that has stopped hides exactly the overdraft we forecast
+        if (today - last).days > cadence * STALE_AFTER_CADENCES:
+            continue
+        recurring.append({
+            "account_id": account_id,
+            "source": source,
+            "cadence_days": cadence,
+            "amount": round(float(avg), 2),
+            "last_date": last,
+        })
+    return recurring
+
+
+def _bill_schedule(db, account_index, today, user_id=None):
+    """
+    (account_id, payee_account_id, due_date, first_amount_cents, recurring_amount_cents)
+    for every payee account with a due date. Bills are charged to the checking
+    account that paid them most recently, else (never paid, or last paid from a
+    non-checking account) the owner's first checking account.
+    Only pif/none accounts are due in full. Loan and compound balances are
+    amortized, so they are charged the typical recent payment, and skipped
+    when there is none to go by.
+    """
+    paid_from = {}
+    history = (
+        select(
+            Payment.payee_account_id,
+            Payment.checking_account_id,
+            func.max(Payment.date),
+            func.avg(Payment.amount),
+        )
+        .where(Payment.date > today - timedelta(days=LOOKBACK_DAYS))
+        .group_by(Payment.payee_account_id, Payment.checking_account_id)
+    )
+    if user_id is not None:
+        history = history.where(Payment.user_id == user_id)
+    for pa_id, acct_id, last, avg in db.execute(history):
+        if pa_id not in paid_from or last > paid_from[pa_id][1]:
+            paid_from[pa_id] = (acct_id, last, avg)
+
+    default_account = {}
+    for acct_id, owner in sorted((a, u) for a, (u, _) in account_index.items()):
+        default_account.setdefault(owner, acct_id)
+
+    stmt = (
+        select(PayeeAccount.id, PayeeAccount.due_date, PayeeAccount.current_balance, PayeeAccount.interest_type,
+               Payee.user_id)
+        .join(Payee, Payee.id == PayeeAccount.payee_id)
+        .where(PayeeAccount.due_date != None)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Payee.user_id == user_id)
+
+    bills = []
+    for pa_id, due, balance, interest_type, owner in db.execute(stmt):
+        acct_id, _, avg_paid = paid_from.get(pa_id, (None, None, None))
+        if interest_type in ("loan", "compound") and not avg_paid:
+            # The balance is the whole principal, not what falls due; with no payment to go by, skip it
+            continue
+        if acct_id not in account_index:
+            # Still charge the bill somewhere: dropping it hides exactly the overdraft we forecast
+            acct_id = default_account.get(owner)
+        if acct_id is None:
+            continue
+        balance_c = max(_cents(balance), 0)
+        typical_c = _cents(avg_paid) if avg_paid else None
+        first_c = min(balance_c, typical_c) if typical_c else balance_c
+        bills.append((acct_id, pa_id, due, first_c, typical_c or 0))
+    return bills
+
+
+def project(db, days, today=None, user_id=None, include_series=False):
+    """
+    Project checking account balances day by day for `days` days. Day 0 is
+    today's balance (less any bill due today). Occurrence offsets are built
+    per series from arrays; the projection itself is one np.add.at scatter and
+    one cumulative sum over an accounts x days matrix.
+    """
+    today = today or date.today()
+    stmt = select(Account.id, Account.user_id, Account.nickname, Account.balance).where(Account.type == "checking")
+    if user_id is not None:
+        stmt = stmt.where(Account.user_id == user_id)
+    accounts = db.execute(stmt.order_by(Account.id)).all()
+    if not accounts:
+        return {"as_of": today, "days": days, "accounts": [], "recurring_deposits": []}
+
+    row_of = {a.id: i for i, a in enumerate(accounts)}
+    account_index = {a.id: (a.user_id, a.nickname) for a in accounts}
+    start = np.array([_cents(a.balance) for a in accounts], dtype=np.int64)
+
+    # Each series contributes (row, offsets, amount); rows/amounts are expanded with np.repeat
+    series_rows, series_offsets, series_amounts = [], [], []
+
+    recurring = [r for r in detect_recurring_deposits(db, today, user_id) if r["account_id"] in row_of]
+    for r in recurring:
+        if r["cadence_days"] == 30:
+            offsets = _monthly_offsets(today, r["last_date"], days, include_today=False)
+        else:
+            since_last = (today - r["last_date"]).days
+            first = r["cadence_days"] - since_last % r["cadence_days"]
+            offsets = np.arange(first, days + 1, r["cadence_days"], dtype=np.int64)
+        r["next_date"] = today + timedelta(days=int(offsets[0])) if offsets.size else None
+        series_rows.append(row_of[r["account_id"]])
+        series_offsets.append(offsets)
+        series_amounts.append(_cents(r["amount"]))
+
+    bill_cols, bill_rows, bill_amounts = [], [], []
+    for acct_id, _, due, first_c, recurring_c in _bill_schedule(db, account_index, today, user_id):
+        offsets = _monthly_offsets(today, due, days, include_today=True)
+        if not offsets.size:
+            continue
+        # First occurrence is the outstanding balance; later ones the typical payment
+        bill_rows.append(row_of[acct_id])
+        bill_cols.append(offsets[0])
+        bill_amounts.append(-first_c)
+        if recurring_c and offsets.size > 1:
+            series_rows.append(row_of[acct_id])
+            series_offsets.append(offsets[1:])
+            series_amounts.append(-recurring_c)
+
+    sizes = np.array([o.size for o in series_offsets], dtype=np.int64)
+    rows = np.concatenate([np.repeat(np.array(series_rows, dtype=np.int64), sizes), np.array(bill_rows, dtype=np.int64)])
+    cols = np.concatenate(series_offsets + [np.array(bill_cols, dtype=np.int64)])
+    amounts = np.concatenate([np.repeat(np.array(series_amounts, dtype=np.int64), sizes), np.array(bill_amounts, dtype=np.int64)])
+
+    deltas = np.zeros((len(accounts), days + 1), dtype=np.int64)
+    np.add.at(deltas, (rows, cols), amounts)
+    balances = start[:, None] + np.cumsum(deltas, axis=1)
+
+    negative = balances < 0
+    # A "goes negative" date is a day below zero that was not already below zero the day before
+    went_negative = negative & ~np.concatenate([np.zeros((len(accounts), 1), dtype=bool), negative[:, :-1]], axis=1)
+    min_day = balances.argmin(axis=1)
+
+    day_dates = [today + timedelta(days=d) for d in range(days + 1)]
+    crossings = [[] for _ in accounts]
+    for i, d in zip(*np.nonzero(went_negative)):
+        crossings[i].append(day_dates[d])
+    starting = (start / 100).tolist()
+    ending = (balances[:, -1] / 100).tolist()
+    lowest = (balances[np.arange(len(accounts)), min_day] / 100).tolist()
+    negative_days = negative.sum(axis=1).tolist()
+
+    result = []
+    for i, a in enumerate(accounts):
+        entry = {
+            "account_id": a.id,
+            "nickname": a.nickname,
+            "starting_balance": starting[i],
+            "ending_balance": ending[i],
+            "min_balance": lowest[i],
+            "min_balance_date": day_dates[min_day[i]],
+            "negative_days": negative_days[i],
+            "goes_negative_on": crossings[i],
+        }
+        if include_series:
+            entry["series"] = (balances[i] / 100).tolist()
+        result.append(entry)
+
+    for r in recurring:
+        del r["last_date"]
+    return {"as_of": today, "days": days, "accounts": result, "recurring_deposits": recurring}
@@ -1,17 +1,16 @@
 # interest_job.py
 from datetime import date
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from database import SessionLocal, engine
+import analytics
 from models import Base, PayeeAccount # Assuming models.py is in the same directory
 
-# --- Database Setup (replace with your actual DB connection) ---
-DATABASE_URL = "sqlite:///./sql_app.db" # Example SQLite, use PostgreSQL for production
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-# --- End Database Setup ---
-
 def apply_monthly_interest():
+    """
+    Apply one month of interest to every PayeeAccount not yet processed this month.
+    Returns the number of accounts updated. Scheduled from scheduler.py.
+    """
     db = SessionLocal()
+    updated = 0
     try:
         today = date.today()
         accounts = db.query(PayeeAccount).all()
@@ -51,16 +50,20 @@ def apply_monthly_interest():
 
             acc.last_interest_calc = today
             db.add(acc)
+            updated += 1
         db.commit()
-    except Exception as e:
+        analytics.invalidate("payee_accounts")
+    except Exception:
+        # Reported once, by the scheduler (or the traceback when run directly)
         db.rollback()
-        print(f"Error during interest calculation: {e}")
+        raise
     finally:
         db.close()
+    return updated
 
 if __name__ == "__main__":
     # Ensure tables are created if running this script directly for testing
     # In a real FastAPI app, this would be handled by migrations or app startup
     Base.metadata.create_all(bind=engine)
-    apply_monthly_interest()
-    print("Monthly interest calculation job completed.")
\ No newline at end of file
+    updated = apply_monthly_interest()
+    print(f"Monthly interest calculation job completed ({updated} accounts).")
\ No newline at end of file
@@ -0,0 +1,70 @@
+# backend/jobs.py
+import logging
+
+from database import SessionLocal
+from models import PayeeAccount
+import search_index
+import analytics
+
+logger = logging.getLogger(__name__)
+# Balances are floats; treat anything under half a cent as equal
+BALANCE_TOLERANCE = 0.005
+
+
+def refresh_rollups():
+    """
+    Rebuild the in-memory search indexes ahead of the next request.
+    On Postgres search is served by trigram indexes and there is nothing to refresh.
+    Returns the number of rows indexed.
+    """
+    db = SessionLocal()
+    try:
+        if db.bind.dialect.name == "postgresql":
+            return 0
+        rows = 0
+        # Only the unscoped indexes are prebuilt (the old ones serve until each swap);
+        # per-user ones are dropped and rebuilt on demand
+        for name in ("payees", "sources", "payee_accounts"):
+            rows += search_index.rebuild(db, name).size()
+            search_index.invalidate(name, scoped_only=True)
+        return rows
+    finally:
+        db.close()
+
+
+def reconcile_balances():
+    """
+    Repair PayeeAccounts where current_balance != principal_balance + accrued_interest.
+    Loans treat principal + interest as authoritative (as payment_logic does);
+    compound accounts treat current_balance as authoritative and re-derive principal.
+    Returns the number of accounts corrected.
+    """
+    db = SessionLocal()
+    fixed = 0
+    try:
+        accounts = db.query(PayeeAccount).filter(PayeeAccount.interest_type.in_(["loan", "compound"])).all()
+        for acc in accounts:
+            current = acc.current_balance or 0.0
+            principal = acc.principal_balance or 0.0
+            accrued = acc.accrued_interest or 0.0
+            if abs(current - (principal + accrued)) < BALANCE_TOLERANCE:
+                continue
+            if acc.interest_type == "loan":
+                acc.current_balance = round(principal + accrued, 2)
+            else:
+                acc.principal_balance = round(max(current - accrued, 0), 2)
+            logger.warning(
+                "Reconciled payee account %s (%s): current_balance %.2f -> %.2f, "
+                "principal_balance %.2f -> %.2f, accrued_interest %.2f",
+                acc.id, acc.interest_type, current, acc.current_balance, principal, acc.principal_balance, accrued,
+            )
+            fixed += 1
+        db.commit()
+        if fixed:
+            analytics.invalidate("payee_accounts")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return fixed
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import api_router
+from database import engine
+from queries import install_statement_cache_stats
+from scheduler import scheduler, SCHEDULER_ENABLED
+import analytics
 
 app = FastAPI(title="Finance Tracker API")
 
@@ -22,6 +26,23 @@ app.add_middleware(
 
 app.include_router(api_router)
 
+install_statement_cache_stats(engine)
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    # Columnar reports refuse to start alongside other API processes
+    analytics.claim(engine)
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+    analytics.release()
+
+
 @app.get("/")
 def read_root():
     return {"msg": "Finance API is running!"}
\ No newline at end of file
@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import date
@@ -32,16 +32,26 @@ class Deposit(Base):
     __tablename__ = "deposits"
     id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized from accounts.user_id
     source = Column(String, nullable=False)   # e.g., Employer A, Client B
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
 
     account = relationship("Account", back_populates="deposits")
 
+    __table_args__ = (Index("idx_deposits_user_date_id", "user_id", "date", "id"),)
+
+class DepositSource(Base):
+    # Distinct (owner, source) pairs of deposits, kept in step by the deposit and account handlers
+    __tablename__ = "deposit_sources"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    source = Column(String, primary_key=True)
+    deposit_count = Column(Integer, nullable=False)
+
 class Payee(Base):
     __tablename__ = "payees"
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
 
     accounts = relationship("PayeeAccount", back_populates="payee")
@@ -59,7 +69,8 @@ class PayeeAccount(Base):
     principal_balance = Column(Float, default=0.0)
     accrued_interest = Column(Float, default=0.0)
     due_date = Column(Date, nullable=True)
-    last_interest_calc = Column(Date, nullable=True)
+    # A new account's entered balance is current: interest_job first charges it next month
+    last_interest_calc = Column(Date, nullable=True, default=date.today)
 
     payee = relationship("Payee", back_populates="accounts")
     payments = relationship("Payment", back_populates="payee_account")
@@ -69,19 +80,29 @@ class Payment(Base):
     id = Column(Integer, primary_key=True)
     checking_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     payee_account_id = Column(Integer, ForeignKey("payee_accounts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized from the checking account
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
 
     checking_account = relationship("Account", back_populates="payments")
     payee_account = relationship("PayeeAccount", back_populates="payments")
 
+    __table_args__ = (Index("idx_payments_user_date_id", "user_id", "date", "id"),)
+
 class Transfer(Base):
     __tablename__ = "transfers"
     id = Column(Integer, primary_key=True)
     from_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     to_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized from the source account
+    to_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized from the destination account
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
 
     from_account = relationship("Account", foreign_keys=[from_account_id], back_populates="transfers_from")
-    to_account = relationship("Account", foreign_keys=[to_account_id], back_populates="transfers_to")
\ No newline at end of file
+    to_account = relationship("Account", foreign_keys=[to_account_id], back_populates="transfers_to")
+
+    __table_args__ = (
+        Index("idx_transfers_user_date_id", "user_id", "date", "id"),
+        Index("idx_transfers_to_user_date_id", "to_user_id", "date", "id"),
+    )
\ No newline at end of file
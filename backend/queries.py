@@ -0,0 +1,117 @@
+# backend/queries.py
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam, delete, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from models import Account, Deposit, DepositSource
+
+# One prebuilt SELECT per model. Parameters are bound at execute time, so the
+# statement (and its compiled form) is reused instead of rebuilt per request.
+_BY_ID = {}
+_BY_IDS = {}
+
+
+def by_id_stmt(model):
+    stmt = _BY_ID.get(model)
+    if stmt is None:
+        stmt = _BY_ID[model] = select(model).where(model.id == bindparam("id"))
+    return stmt
+
+
+def by_ids_stmt(model):
+    stmt = _BY_IDS.get(model)
+    if stmt is None:
+        stmt = _BY_IDS[model] = select(model).where(model.id.in_(bindparam("ids", expanding=True)))
+    return stmt
+
+
+def get_by_id(db, model, obj_id):
+    """Cached equivalent of db.query(model).filter(model.id == obj_id).first()."""
+    return db.execute(by_id_stmt(model), {"id": obj_id}).scalars().first()
+
+
+def get_by_ids(db, model, ids):
+    return db.execute(by_ids_stmt(model), {"ids": list(ids)}).scalars().all()
+
+
+_ACCOUNT_USER = select(Account.user_id).where(Account.id == bindparam("id"))
+
+
+def account_user_id(db, account_id):
+    """Owner of an account, used to stamp the denormalized user_id on transactions."""
+    return db.execute(_ACCOUNT_USER, {"id": account_id}).scalar()
+
+
+def count_deposit_sources(db, changes):
+    """
+    Apply (user_id, source, delta) changes to deposit_sources in the caller's
+    transaction; pairs whose count drops to zero are removed.
+    """
+    deltas = Counter()
+    for user_id, source, delta in changes:
+        deltas[user_id, source] += delta
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(DepositSource).values([
+        {"user_id": user_id, "source": source, "deposit_count": delta}
+        for (user_id, source), delta in deltas.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DepositSource.user_id, DepositSource.source],
+        set_={"deposit_count": DepositSource.deposit_count + stmt.excluded.deposit_count},
+    ))
+    if any(delta < 0 for delta in deltas.values()):
+        db.execute(delete(DepositSource).where(
+            DepositSource.user_id.in_({user_id for user_id, _ in deltas}), DepositSource.deposit_count <= 0
+        ))
+
+
+def account_deposit_sources(db, account_id):
+    """(source, deposit count) of one account, for moving its sources to a new owner."""
+    return db.execute(
+        select(Deposit.source, func.count(Deposit.id)).where(Deposit.account_id == account_id).group_by(Deposit.source)
+    ).all()
+
+
+class StatementCacheStats:
+    """Counts compiled-cache hits/misses reported by SQLAlchemy for each execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def record(self, cache_hit):
+        with self._lock:
+            if cache_hit is CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+
+    def snapshot(self):
+        with self._lock:
+            cached = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.uncached,
+                "hit_rate": (self.hits / cached) if cached else 0.0,
+            }
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def install_statement_cache_stats(engine):
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            statement_cache_stats.record(context.cache_hit)
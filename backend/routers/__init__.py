@@ -8,6 +8,8 @@ from .transfers import router as transfers_router
 from .payments import router as payments_router
 from .payee_accounts import router as payee_accounts_router
 from .reports import router as reports_router
+from .search import router as search_router
+from .stats import router as stats_router
 
 api_router = APIRouter()
 
@@ -20,5 +22,7 @@ api_router.include_router(transfers_router)
 api_router.include_router(payments_router)
 api_router.include_router(payee_accounts_router)
 api_router.include_router(reports_router)
+api_router.include_router(search_router)
+api_router.include_router(stats_router)
 
 __all__ = ["api_router"]
\ No newline at end of file
@@ -2,13 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import queries
+import search_index
+import analytics
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
 
 @router.get("/", response_model=list[schemas.AccountRead])
-def list_accounts(db: Session = Depends(get_db)):
-    return db.query(models.Account).all()
+def list_accounts(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(models.Account)
+    if user_id is not None:
+        q = q.filter(models.Account.user_id == user_id)
+    return q.all()
 
 
 @router.post("/", response_model=schemas.AccountRead)
@@ -22,21 +28,43 @@ def create_account(acc: schemas.AccountCreate, db: Session = Depends(get_db)):
 
 @router.put("/{account_id}", response_model=schemas.AccountRead)
 def update_account(account_id: int, acc: schemas.AccountUpdate, db: Session = Depends(get_db)):
-    db_acc = db.query(models.Account).filter(models.Account.id == account_id).first()
+    db_acc = queries.get_by_id(db, models.Account, account_id)
     if not db_acc:
         raise HTTPException(status_code=404, detail="Account not found")
+    old_user_id = db_acc.user_id
     for field, value in acc.dict(exclude_unset=True).items():
         setattr(db_acc, field, value)
+    if acc.user_id is not None:
+        queries.count_deposit_sources(db, [
+            (user_id, source, sign * n)
+            for source, n in queries.account_deposit_sources(db, account_id)
+            for user_id, sign in ((old_user_id, -1), (acc.user_id, 1))
+        ])
+        # Keep the denormalized owner on this account's transactions in step
+        for account_column, owner_column in (
+            (models.Deposit.account_id, models.Deposit.user_id),
+            (models.Payment.checking_account_id, models.Payment.user_id),
+            (models.Transfer.from_account_id, models.Transfer.user_id),
+            (models.Transfer.to_account_id, models.Transfer.to_user_id),
+        ):
+            db.query(account_column.class_).filter(account_column == account_id).update(
+                {owner_column: acc.user_id}, synchronize_session=False
+            )
     db.commit()
+    if acc.user_id is not None:
+        # Per-user source suggestions were built from the old owner's deposits
+        search_index.invalidate("sources", scoped_only=True)
+        analytics.invalidate()
     db.refresh(db_acc)
     return db_acc
 
 
 @router.delete("/{account_id}")
 def delete_account(account_id: int, db: Session = Depends(get_db)):
-    db_acc = db.query(models.Account).filter(models.Account.id == account_id).first()
+    db_acc = queries.get_by_id(db, models.Account, account_id)
     if not db_acc:
         raise HTTPException(status_code=404, detail="Account not found")
     db.delete(db_acc)
     db.commit()
+    analytics.invalidate()
     return {"ok": True}
\ No newline at end of file
@@ -2,41 +2,68 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import queries
+import search_index
+import analytics
 
 router = APIRouter(prefix="/deposits", tags=["deposits"])
 
 
 @router.get("/", response_model=list[schemas.DepositRead])
-def list_deposits(db: Session = Depends(get_db)):
-    return db.query(models.Deposit).all()
+def list_deposits(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(models.Deposit)
+    if user_id is not None:
+        q = q.filter(models.Deposit.user_id == user_id)
+    return q.all()
 
 
 @router.post("/", response_model=schemas.DepositRead)
 def create_deposit(dep: schemas.DepositCreate, db: Session = Depends(get_db)):
-    deposit = models.Deposit(**dep.dict())
+    user_id = queries.account_user_id(db, dep.account_id)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    deposit = models.Deposit(**dep.dict(), user_id=user_id)
     db.add(deposit)
+    queries.count_deposit_sources(db, [(user_id, deposit.source, 1)])
     db.commit()
     db.refresh(deposit)
+    analytics.record_deposit(deposit)
+    search_index.add("sources", deposit.source, {"source": deposit.source}, deposit.user_id)
     return deposit
 
 
 @router.put("/{deposit_id}", response_model=schemas.DepositRead)
 def update_deposit(deposit_id: int, dep: schemas.DepositUpdate, db: Session = Depends(get_db)):
-    db_dep = db.query(models.Deposit).filter(models.Deposit.id == deposit_id).first()
+    db_dep = queries.get_by_id(db, models.Deposit, deposit_id)
     if not db_dep:
         raise HTTPException(status_code=404, detail="Deposit not found")
+    old_source, old_user_id = db_dep.source, db_dep.user_id
     for field, value in dep.dict(exclude_unset=True).items():
         setattr(db_dep, field, value)
+    if dep.account_id is not None:
+        db_dep.user_id = queries.account_user_id(db, dep.account_id)
+        if db_dep.user_id is None:
+            raise HTTPException(status_code=404, detail="Account not found")
+    queries.count_deposit_sources(db, [(old_user_id, old_source, -1), (db_dep.user_id, db_dep.source, 1)])
     db.commit()
     db.refresh(db_dep)
+    if (db_dep.source, db_dep.user_id) != (old_source, old_user_id):
+        search_index.replace("sources", old_source, {"source": old_source}, db_dep.source,
+                             {"source": db_dep.source}, old_user_id, db_dep.user_id)
+    analytics.record_deposit(db_dep)
     return db_dep
 
 
 @router.delete("/{deposit_id}")
 def delete_deposit(deposit_id: int, db: Session = Depends(get_db)):
-    db_dep = db.query(models.Deposit).filter(models.Deposit.id == deposit_id).first()
+    db_dep = queries.get_by_id(db, models.Deposit, deposit_id)
     if not db_dep:
         raise HTTPException(status_code=404, detail="Deposit not found")
+    source, user_id = db_dep.source, db_dep.user_id
     db.delete(db_dep)
+    queries.count_deposit_sources(db, [(user_id, source, -1)])
     db.commit()
+    # Drops one reference; the source stays while other deposits use it
+    search_index.remove("sources", source, {"source": source}, user_id)
+    analytics.forget("deposits", deposit_id)
     return {"ok": True}
\ No newline at end of file
@@ -2,41 +2,76 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import queries
+import cache
+import search_index
+import analytics
 
 router = APIRouter(prefix="/payee-accounts", tags=["payee-accounts"])
 
 
+def _index_entry(db, pa):
+    """(text, payload, user_id) of a payee account in the search index."""
+    payee = cache.payees.get(db, pa.payee_id) or {}
+    return pa.account_label, {
+        "id": pa.id,
+        "payee_id": pa.payee_id,
+        "account_label": pa.account_label,
+        "category": pa.category,
+    }, payee.get("user_id")
+
+
 @router.get("/", response_model=list[schemas.PayeeAccountRead])
-def list_payee_accounts(db: Session = Depends(get_db)):
-    return db.query(models.PayeeAccount).all()
+def list_payee_accounts(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(models.PayeeAccount)
+    if user_id is not None:
+        q = q.join(models.Payee).filter(models.Payee.user_id == user_id)
+    return q.all()
 
 
 @router.post("/", response_model=schemas.PayeeAccountRead)
 def create_payee_account(pa: schemas.PayeeAccountCreate, db: Session = Depends(get_db)):
+    if cache.payees.get(db, pa.payee_id) is None:
+        raise HTTPException(status_code=404, detail="Payee not found")
     payee_account = models.PayeeAccount(**pa.dict())
     db.add(payee_account)
     db.commit()
     db.refresh(payee_account)
+    label, payload, user_id = _index_entry(db, payee_account)
+    search_index.add("payee_accounts", label, payload, user_id)
+    analytics.record_payee_account(payee_account, user_id)
     return payee_account
 
 
 @router.put("/{payee_account_id}", response_model=schemas.PayeeAccountRead)
 def update_payee_account(payee_account_id: int, pa: schemas.PayeeAccountUpdate, db: Session = Depends(get_db)):
-    db_pa = db.query(models.PayeeAccount).filter(models.PayeeAccount.id == payee_account_id).first()
+    db_pa = queries.get_by_id(db, models.PayeeAccount, payee_account_id)
     if not db_pa:
         raise HTTPException(status_code=404, detail="Payee Account not found")
+    if pa.payee_id is not None and cache.payees.get(db, pa.payee_id) is None:
+        raise HTTPException(status_code=404, detail="Payee not found")
+    old = _index_entry(db, db_pa)
     for field, value in pa.dict(exclude_unset=True).items():
         setattr(db_pa, field, value)
     db.commit()
+    cache.payee_accounts.invalidate(payee_account_id)
     db.refresh(db_pa)
+    new = _index_entry(db, db_pa)
+    if new != old:
+        search_index.replace("payee_accounts", old[0], old[1], new[0], new[1], old[2], new[2])
+    analytics.record_payee_account(db_pa, new[2])
     return db_pa
 
 
 @router.delete("/{payee_account_id}")
 def delete_payee_account(payee_account_id: int, db: Session = Depends(get_db)):
-    db_pa = db.query(models.PayeeAccount).filter(models.PayeeAccount.id == payee_account_id).first()
+    db_pa = queries.get_by_id(db, models.PayeeAccount, payee_account_id)
     if not db_pa:
         raise HTTPException(status_code=404, detail="Payee Account not found")
+    label, payload, user_id = _index_entry(db, db_pa)
     db.delete(db_pa)
     db.commit()
+    cache.payee_accounts.invalidate(payee_account_id)
+    search_index.remove("payee_accounts", label, payload, user_id)
+    analytics.forget("payee_accounts", payee_account_id)
     return {"ok": True}
\ No newline at end of file
@@ -2,13 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import queries
+import cache
+import search_index
 
 router = APIRouter(prefix="/payees", tags=["payees"])
 
 
 @router.get("/", response_model=list[schemas.PayeeRead])
-def list_payees(db: Session = Depends(get_db)):
-    return db.query(models.Payee).all()
+def list_payees(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(models.Payee)
+    if user_id is not None:
+        q = q.filter(models.Payee.user_id == user_id)
+    return q.all()
 
 
 @router.post("/", response_model=schemas.PayeeRead)
@@ -17,26 +23,37 @@ def create_payee(payee: schemas.PayeeCreate, db: Session = Depends(get_db)):
     db.add(db_payee)
     db.commit()
     db.refresh(db_payee)
+    search_index.add("payees", db_payee.name, {"id": db_payee.id, "name": db_payee.name}, db_payee.user_id)
     return db_payee
 
 
 @router.put("/{payee_id}", response_model=schemas.PayeeRead)
 def update_payee(payee_id: int, payee: schemas.PayeeUpdate, db: Session = Depends(get_db)):
-    db_payee = db.query(models.Payee).filter(models.Payee.id == payee_id).first()
+    db_payee = queries.get_by_id(db, models.Payee, payee_id)
     if not db_payee:
         raise HTTPException(status_code=404, detail="Payee not found")
+    old_name = db_payee.name
     for field, value in payee.dict(exclude_unset=True).items():
         setattr(db_payee, field, value)
     db.commit()
+    cache.payees.invalidate(payee_id)
+    search_index.replace("payees", old_name, {"id": payee_id, "name": old_name},
+                         db_payee.name, {"id": payee_id, "name": db_payee.name}, db_payee.user_id, db_payee.user_id)
     db.refresh(db_payee)
     return db_payee
 
 
 @router.delete("/{payee_id}")
 def delete_payee(payee_id: int, db: Session = Depends(get_db)):
-    db_payee = db.query(models.Payee).filter(models.Payee.id == payee_id).first()
+    db_payee = queries.get_by_id(db, models.Payee, payee_id)
     if not db_payee:
         raise HTTPException(status_code=404, detail="Payee not found")
+    # Payee.accounts has no ORM cascade: the flush would NULL payee_accounts.payee_id and fail
+    if db.query(models.PayeeAccount.id).filter(models.PayeeAccount.payee_id == payee_id).first():
+        raise HTTPException(status_code=409, detail="Payee still has payee accounts; delete them first")
+    name, user_id = db_payee.name, db_payee.user_id
     db.delete(db_payee)
     db.commit()
+    cache.payees.invalidate(payee_id)
+    search_index.remove("payees", name, {"id": payee_id, "name": name}, user_id)
     return {"ok": True}
\ No newline at end of file
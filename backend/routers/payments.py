@@ -2,41 +2,61 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
+import queries
+import cache
+import analytics
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
 
 @router.get("/", response_model=list[schemas.PaymentRead])
-def list_payments(db: Session = Depends(get_db)):
-    return db.query(models.Payment).all()
+def list_payments(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(models.Payment)
+    if user_id is not None:
+        q = q.filter(models.Payment.user_id == user_id)
+    return q.all()
 
 
 @router.post("/", response_model=schemas.PaymentRead)
 def create_payment(pay: schemas.PaymentCreate, db: Session = Depends(get_db)):
-    payment = models.Payment(**pay.dict())
+    user_id = queries.account_user_id(db, pay.checking_account_id)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Checking account not found")
+    if cache.payee_accounts.get(db, pay.payee_account_id) is None:
+        raise HTTPException(status_code=404, detail="Payee Account not found")
+    payment = models.Payment(**pay.dict(), user_id=user_id)
     db.add(payment)
     db.commit()
     db.refresh(payment)
+    analytics.record_payment(payment)
     return payment
 
 
 @router.put("/{payment_id}", response_model=schemas.PaymentRead)
 def update_payment(payment_id: int, pay: schemas.PaymentUpdate, db: Session = Depends(get_db)):
-    db_pay = db.query(models.Payment).filter(models.Payment.id == payment_id).first()
+    db_pay = queries.get_by_id(db, models.Payment, payment_id)
     if not db_pay:
         raise HTTPException(status_code=404, detail="Payment not found")
     for field, value in pay.dict(exclude_unset=True).items():
         setattr(db_pay, field, value)
+    if pay.checking_account_id is not None:
+        db_pay.user_id = queries.account_user_id(db, pay.checking_account_id)
+        if db_pay.user_id is None:
+            raise HTTPException(status_code=404, detail="Checking account not found")
+    if pay.payee_account_id is not None and cache.payee_accounts.get(db, pay.payee_account_id) is None:
+        raise HTTPException(status_code=404, detail="Payee Account not found")
     db.commit()
     db.refresh(db_pay)
+    analytics.record_payment(db_pay)
     return db_pay
 
 
 @router.delete("/{payment_id}")
 def delete_payment(payment_id: int, db: Session = Depends(get_db)):
-    db_pay = db.query(models.Payment).filter(models.Payment.id == payment_id).first()
+    db_pay = queries.get_by_id(db, models.Payment, payment_id)
     if not db_pay:
         raise HTTPException(status_code=404, detail="Payment not found")
     db.delete(db_pay)
     db.commit()
+    analytics.forget("payments", payment_id)
     return {"ok": True}
\ No newline at end of file
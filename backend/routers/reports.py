@@ -1,33 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, extract, and_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, extract, and_, select, union_all, literal, lambda_stmt, bindparam, String, Date
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime, timedelta
 from database import get_db
-from models import Deposit, Payment, PayeeAccount, Account
+from models import Deposit, Payment, Payee, PayeeAccount, Account, Transfer
+import analytics
+import forecast
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# Report queries are lambda statements: the optional filters are appended as
+# separate lambdas, so each filter combination is built and compiled once and
+# later requests only bind new parameter values.
+# Every report takes an optional user_id; transaction tables carry a
+# denormalized user_id with (user_id, date, id) indexes for that filter.
+# With ANALYTICS_MODE=columnar, reports 1-4 are answered from analytics.py.
+
 # 1) Deposits by source (optionally by date range and/or account)
 @router.get("/deposits-by-source")
 def deposits_by_source(
     db: Session = Depends(get_db),
     start_date: date | None = None,
     end_date: date | None = None,
-    account_id: int | None = None
+    account_id: int | None = None,
+    user_id: int | None = None
 ):
-    q = db.query(
+    if analytics.enabled():
+        return analytics.get_store(db).deposits_by_source(start_date, end_date, account_id, user_id)
+
+    stmt = lambda_stmt(lambda: select(
         Deposit.source,
         func.count(Deposit.id).label("count"),
         func.sum(Deposit.amount).label("total_amount"),
-    )
+    ))
     if start_date:
-        q = q.filter(Deposit.date >= start_date)
+        stmt += lambda s: s.where(Deposit.date >= start_date)
     if end_date:
-        q = q.filter(Deposit.date <= end_date)
+        stmt += lambda s: s.where(Deposit.date <= end_date)
     if account_id:
-        q = q.filter(Deposit.account_id == account_id)
-    q = q.group_by(Deposit.source).order_by(func.sum(Deposit.amount).desc())
-    rows = q.all()
+        stmt += lambda s: s.where(Deposit.account_id == account_id)
+    if user_id is not None:
+        stmt += lambda s: s.where(Deposit.user_id == user_id)
+    stmt += lambda s: s.group_by(Deposit.source).order_by(func.sum(Deposit.amount).desc(), Deposit.source)
+    rows = db.execute(stmt).all()
     return [
         {"source": r[0], "count": int(r[1] or 0), "total_amount": float(r[2] or 0.0)}
         for r in rows
@@ -35,18 +50,29 @@ def deposits_by_source(
 
 # 2) Payee balances summary (group by payee and by category)
 @router.get("/payees-balances-summary")
-def payee_balances_summary(db: Session = Depends(get_db)):
+def payee_balances_summary(db: Session = Depends(get_db), user_id: int | None = None):
+    if analytics.enabled():
+        return analytics.get_store(db).payee_balances_summary(user_id)
+
     # by payee
-    by_payee = db.query(
+    pq = lambda_stmt(lambda: select(
         PayeeAccount.payee_id,
         func.sum(PayeeAccount.current_balance).label("total_balance")
-    ).group_by(PayeeAccount.payee_id).all()
+    ))
 
     # by category
-    by_category = db.query(
+    cq = lambda_stmt(lambda: select(
         PayeeAccount.category,
         func.sum(PayeeAccount.current_balance).label("total_balance")
-    ).group_by(PayeeAccount.category).all()
+    ))
+
+    if user_id is not None:
+        pq += lambda s: s.join(Payee, Payee.id == PayeeAccount.payee_id).where(Payee.user_id == user_id)
+        cq += lambda s: s.join(Payee, Payee.id == PayeeAccount.payee_id).where(Payee.user_id == user_id)
+    pq += lambda s: s.group_by(PayeeAccount.payee_id).order_by(PayeeAccount.payee_id)
+    cq += lambda s: s.group_by(PayeeAccount.category).order_by(PayeeAccount.category)
+    by_payee = db.execute(pq).all()
+    by_category = db.execute(cq).all()
 
     return {
         "by_payee": [{"payee_id": pid, "total_balance": float(total or 0.0)} for pid, total in by_payee],
@@ -59,17 +85,21 @@ def payments_history(
     db: Session = Depends(get_db),
     payee_account_id: int | None = None,
     start_date: date | None = None,
-    end_date: date | None = None
+    end_date: date | None = None,
+    user_id: int | None = None
 ):
-    q = db.query(Payment).order_by(Payment.date.desc())
+    if analytics.enabled():
+        return analytics.get_store(db).payments_history(payee_account_id, start_date, end_date, user_id)
+
+    stmt = lambda_stmt(lambda: select(Payment).order_by(Payment.date.desc(), Payment.id.desc()))
+    if user_id is not None:
+        stmt += lambda s: s.where(Payment.user_id == user_id)
     if payee_account_id:
-        q = q.filter(Payment.payee_account_id == payee_account_id)
+        stmt += lambda s: s.where(Payment.payee_account_id == payee_account_id)
     if start_date:
-        q = q.filter(Payment.date >= start_date)
+        stmt += lambda s: s.where(Payment.date >= start_date)
     if end_date:
-        q = q.filter(Payment.date <= end_date)
-
-    payments = q.all()
+        stmt += lambda s: s.where(Payment.date <= end_date)
     return [
         {
             "id": p.id,
@@ -77,33 +107,40 @@ def payments_history(
             "amount": p.amount,
             "payee_account_id": p.payee_account_id,
             "checking_account_id": p.checking_account_id
-        } for p in payments
+        } for p in db.execute(stmt).scalars()
     ]
 
 # 4) Cash flow by month (net inflow/outflow), excluding transfers
 @router.get("/cashflow-monthly")
 def cashflow_monthly(
     db: Session = Depends(get_db),
-    year: int | None = None
+    year: int | None = None,
+    user_id: int | None = None
 ):
-    dq = db.query(
+    if analytics.enabled():
+        return analytics.get_store(db).cashflow_monthly(year, user_id)
+
+    dq = lambda_stmt(lambda: select(
         extract('year', Deposit.date).label("y"),
         extract('month', Deposit.date).label("m"),
         func.sum(Deposit.amount).label("inflow")
-    ).group_by("y", "m")
+    ).group_by("y", "m"))
 
-    pq = db.query(
+    pq = lambda_stmt(lambda: select(
         extract('year', Payment.date).label("y"),
         extract('month', Payment.date).label("m"),
         func.sum(Payment.amount).label("outflow")
-    ).group_by("y", "m")
+    ).group_by("y", "m"))
 
+    if user_id is not None:
+        dq += lambda s: s.where(Deposit.user_id == user_id)
+        pq += lambda s: s.where(Payment.user_id == user_id)
     if year:
-        dq = dq.having(extract('year', Deposit.date) == year)
-        pq = pq.having(extract('year', Payment.date) == year)
+        dq += lambda s: s.having(extract('year', Deposit.date) == year)
+        pq += lambda s: s.having(extract('year', Payment.date) == year)
 
-    deposits = {(int(y), int(m)): float(inflow or 0.0) for y, m, inflow in dq.all()}
-    payments = {(int(y), int(m)): float(outflow or 0.0) for y, m, outflow in pq.all()}
+    deposits = {(int(y), int(m)): float(inflow or 0.0) for y, m, inflow in db.execute(dq).all()}
+    payments = {(int(y), int(m)): float(outflow or 0.0) for y, m, outflow in db.execute(pq).all()}
 
     keys = set(deposits.keys()) | set(payments.keys())
     result = []
@@ -123,14 +160,17 @@ def cashflow_monthly(
 @router.get("/payees-upcoming-due")
 def upcoming_due(
     db: Session = Depends(get_db),
-    within_days: int = 21
+    within_days: int = 21,
+    user_id: int | None = None
 ):
-    from datetime import datetime, timedelta
     today = datetime.utcnow().date()
     horizon = today + timedelta(days=within_days)
-    rows = db.query(PayeeAccount).filter(
+    stmt = lambda_stmt(lambda: select(PayeeAccount).where(
         and_(PayeeAccount.due_date != None, PayeeAccount.due_date <= horizon)
-    ).order_by(PayeeAccount.due_date.asc()).all()
+    ).order_by(PayeeAccount.due_date.asc()))
+    if user_id is not None:
+        stmt += lambda s: s.join(Payee, Payee.id == PayeeAccount.payee_id).where(Payee.user_id == user_id)
+    rows = db.execute(stmt).scalars().all()
 
     return [
         {
@@ -143,4 +183,153 @@ def upcoming_due(
             "interest_type": r.interest_type,
             "account_number": r.account_number
         } for r in rows
-    ]
\ No newline at end of file
+    ]
+
+# 6) Rolling 7/30/90-day inflow/outflow/net per account and per payee category
+ROLLING_WINDOWS = (7, 30, 90)
+ROLLING_MAX_DAYS = 366
+
+
+class _RollingWindows:
+    """
+    Incremental sliding-window sums over a date-ordered event stream.
+    Amounts are kept in integer cents so repeated add/subtract does not drift.
+    """
+
+    def __init__(self, windows):
+        self.windows = windows
+        self.events = []                      # (date, inflow_cents, outflow_cents)
+        self.tails = [0] * len(windows)       # first event still inside each window
+        self.sums = [[0, 0] for _ in windows]
+
+    def push(self, day, inflow, outflow):
+        self.events.append((day, inflow, outflow))
+        for s in self.sums:
+            s[0] += inflow
+            s[1] += outflow
+
+    def advance(self, day):
+        """Expire events that fell out of each window ending on `day`."""
+        for i, w in enumerate(self.windows):
+            cutoff = day - timedelta(days=w)
+            tail, s = self.tails[i], self.sums[i]
+            while tail < len(self.events) and self.events[tail][0] <= cutoff:
+                s[0] -= self.events[tail][1]
+                s[1] -= self.events[tail][2]
+                tail += 1
+            self.tails[i] = tail
+        # The widest window's tail is the furthest back any window still needs
+        widest = self.tails[self.windows.index(max(self.windows))]
+        if widest > 1024:
+            del self.events[:widest]
+            self.tails = [t - widest for t in self.tails]
+
+    def active(self):
+        return self.tails[self.windows.index(max(self.windows))] < len(self.events)
+
+    def row(self):
+        out = {}
+        for w, (inflow, outflow) in zip(self.windows, self.sums):
+            out[f"inflow_{w}d"] = inflow / 100
+            out[f"outflow_{w}d"] = outflow / 100
+            out[f"net_{w}d"] = (inflow - outflow) / 100
+        return out
+
+
+def _rolling_stream(scoped):
+    """
+    One date-ordered stream: (account_id, category, date, inflow, outflow).
+    Transfers move money between accounts, so they count per account but carry no category.
+    With scoped=True every branch is filtered on :user_id; incoming transfers on the
+    receiving account's owner (to_user_id), which can differ from the sender.
+    """
+    start = bindparam("stream_start", type_=Date)
+    end = bindparam("end_date", type_=Date)
+    zero = literal(0.0)
+    no_category = literal(None, String)
+    branches = [
+        (Deposit.user_id, select(Deposit.account_id, no_category, Deposit.date, Deposit.amount, zero)),
+        (Payment.user_id, select(Payment.checking_account_id, PayeeAccount.category, Payment.date, zero, Payment.amount)
+         .join(PayeeAccount, PayeeAccount.id == Payment.payee_account_id)),
+        (Transfer.user_id, select(Transfer.from_account_id, no_category, Transfer.date, zero, Transfer.amount)),
+        (Transfer.to_user_id, select(Transfer.to_account_id, no_category, Transfer.date, Transfer.amount, zero)),
+    ]
+    selects = []
+    for owner, sel in branches:
+        model = owner.class_
+        sel = sel.where(model.date.between(start, end))
+        if scoped:
+            sel = sel.where(owner == bindparam("user_id"))
+        selects.append(sel)
+    stream = union_all(*selects).subquery()
+    return select(stream).order_by(list(stream.c)[2])
+
+
+_ROLLING_STREAM = _rolling_stream(scoped=False)
+_ROLLING_STREAM_BY_USER = _rolling_stream(scoped=True)
+
+
+@router.get("/rolling")
+def rolling(
+    db: Session = Depends(get_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    user_id: int | None = None
+):
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days >= ROLLING_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {ROLLING_MAX_DAYS} days")
+
+    stream_start = start_date - timedelta(days=max(ROLLING_WINDOWS) - 1)
+    params = {"stream_start": stream_start, "end_date": end_date}
+    if user_id is None:
+        rows = db.execute(_ROLLING_STREAM, params).yield_per(5000)
+    else:
+        rows = db.execute(_ROLLING_STREAM_BY_USER, {**params, "user_id": user_id}).yield_per(5000)
+
+    by_account, by_category = {}, {}
+    pending = next(rows, None)
+    result_accounts, result_categories = [], []
+    day = stream_start
+    while day <= end_date:
+        # Feed every event dated on or before `day`
+        while pending is not None and pending[2] <= day:
+            account_id, category, _, inflow, outflow = pending
+            inflow_c, outflow_c = round(float(inflow or 0) * 100), round(float(outflow or 0) * 100)
+            by_account.setdefault(account_id, _RollingWindows(ROLLING_WINDOWS)).push(pending[2], inflow_c, outflow_c)
+            if category is not None:
+                by_category.setdefault(category, _RollingWindows(ROLLING_WINDOWS)).push(pending[2], inflow_c, outflow_c)
+            pending = next(rows, None)
+
+        if day >= start_date:
+            for account_id, agg in sorted(by_account.items()):
+                agg.advance(day)
+                if agg.active():
+                    result_accounts.append({"date": day, "account_id": account_id, **agg.row()})
+            for category, agg in sorted(by_category.items()):
+                agg.advance(day)
+                if agg.active():
+                    result_categories.append({"date": day, "category": category, **agg.row()})
+        day += timedelta(days=1)
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "windows": list(ROLLING_WINDOWS),
+        "by_account": result_accounts,
+        "by_category": result_categories,
+    }
+
+
+# 7) Forward cash-flow forecast for checking accounts (next N days)
+@router.get("/forecast")
+def cash_forecast(
+    db: Session = Depends(get_db),
+    days: int = Query(90, ge=1, le=730),
+    user_id: int | None = None,
+    include_series: bool = False
+):
+    return forecast.project(db, days, user_id=user_id, include_series=include_series)
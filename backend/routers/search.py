@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import get_db
+from models import DepositSource, Payee, PayeeAccount
+import search_index
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# Similarity cutoff for the in-memory fallback, matching pg_trgm.similarity_threshold's default
+FUZZY_THRESHOLD = 0.3
+
+
+def _use_trigram_indexes(db: Session) -> bool:
+    # init.sql installs pg_trgm and GIN indexes on Postgres; everything else uses the in-memory trie
+    return db.bind.dialect.name == "postgresql"
+
+
+def _like_prefix(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _sql_search(query, text_col, q: str, fuzzy: bool, limit: int):
+    if fuzzy:
+        # The % operator (not similarity() >= x) is what lets Postgres use the GIN trigram index
+        query = query.filter(text_col.op("%")(q)).order_by(func.similarity(text_col, q).desc(), text_col)
+    else:
+        # lower(col) LIKE 'q%' is served by the text_pattern_ops btree and stops at LIMIT
+        lowered = func.lower(text_col)
+        query = query.filter(lowered.like(_like_prefix(q.lower()), escape="\\")).order_by(lowered)
+    return query.limit(limit).all()
+
+
+def _memory_search(db: Session, name: str, q: str, fuzzy: bool, limit: int, user_id: int | None):
+    return search_index.search(db, name, q, limit, user_id, fuzzy, FUZZY_THRESHOLD)
+
+
+@router.get("/payees")
+def search_payees(
+    q: str = Query(..., min_length=1),
+    fuzzy: bool = False,
+    limit: int = Query(20, ge=1, le=200),
+    user_id: int | None = None,
+    db: Session = Depends(get_db)
+):
+    if not _use_trigram_indexes(db):
+        return _memory_search(db, "payees", q, fuzzy, limit, user_id)
+    query = db.query(Payee.id, Payee.name)
+    if user_id is not None:
+        query = query.filter(Payee.user_id == user_id)
+    rows = _sql_search(query, Payee.name, q, fuzzy, limit)
+    return [{"id": pid, "name": name} for pid, name in rows]
+
+
+@router.get("/sources")
+def search_sources(
+    q: str = Query(..., min_length=1),
+    fuzzy: bool = False,
+    limit: int = Query(20, ge=1, le=200),
+    user_id: int | None = None,
+    db: Session = Depends(get_db)
+):
+    if not _use_trigram_indexes(db):
+        return _memory_search(db, "sources", q, fuzzy, limit, user_id)
+    # deposit_sources has one row per (user, source), so a scoped search stops at LIMIT
+    # instead of aggregating every matching deposit
+    query = db.query(DepositSource.source)
+    if user_id is not None:
+        query = query.filter(DepositSource.user_id == user_id)
+    else:
+        # Group instead of DISTINCT so ORDER BY on lower(source) stays valid
+        query = query.group_by(DepositSource.source)
+    rows = _sql_search(query, DepositSource.source, q, fuzzy, limit)
+    return [{"source": source} for (source,) in rows]
+
+
+@router.get("/payee-accounts")
+def search_payee_accounts(
+    q: str = Query(..., min_length=1),
+    fuzzy: bool = False,
+    limit: int = Query(20, ge=1, le=200),
+    user_id: int | None = None,
+    db: Session = Depends(get_db)
+):
+    if not _use_trigram_indexes(db):
+        return _memory_search(db, "payee_accounts", q, fuzzy, limit, user_id)
+    columns = [PayeeAccount.id, PayeeAccount.payee_id, PayeeAccount.account_label, PayeeAccount.category]
+    query = db.query(*columns)
+    if user_id is not None:
+        query = query.join(Payee, Payee.id == PayeeAccount.payee_id).filter(Payee.user_id == user_id)
+    rows = _sql_search(query, PayeeAccount.account_label, q, fuzzy, limit)
+    return [
+        {"id": pa_id, "payee_id": payee_id, "account_label": label, "category": category}
+        for pa_id, payee_id, label, category in rows
+    ]
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+import analytics
+import cache
+import queries
+from scheduler import scheduler
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/reference-cache")
+def reference_cache_stats():
+    return cache.cache_stats()
+
+
+@router.get("/statement-cache")
+def statement_cache_stats():
+    return queries.statement_cache_stats.snapshot()
+
+
+@router.get("/analytics")
+def analytics_stats():
+    return analytics.store.stats()
+
+
+@router.get("/jobs")
+def job_stats():
+    return scheduler.stats()
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Transfer, Account
 from schemas import TransferCreate, TransferRead
+import queries
+import analytics
 
 router = APIRouter(prefix="/transfers", tags=["transfers"])
 
@@ -11,8 +14,12 @@ def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
     if transfer.from_account_id == transfer.to_account_id:
         raise HTTPException(status_code=400, detail="Cannot transfer within same account")
 
-    from_acc = db.query(Account).filter(Account.id == transfer.from_account_id).first()
-    to_acc = db.query(Account).filter(Account.id == transfer.to_account_id).first()
+    # Fetch both sides in one round trip
+    accounts = {
+        a.id: a for a in queries.get_by_ids(db, Account, [transfer.from_account_id, transfer.to_account_id])
+    }
+    from_acc = accounts.get(transfer.from_account_id)
+    to_acc = accounts.get(transfer.to_account_id)
 
     if not from_acc or not to_acc:
         raise HTTPException(status_code=404, detail="One or both accounts not found")
@@ -20,17 +27,22 @@ def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
     if from_acc.balance < transfer.amount:
         raise HTTPException(status_code=400, detail="Insufficient funds in source account")
 
-    # Adjust balances
-    from_acc.balance -= transfer.amount
-    to_acc.balance += transfer.amount
+    # Adjust balances (Account.balance is a float column; the schema amount is a Decimal)
+    from_acc.balance -= float(transfer.amount)
+    to_acc.balance += float(transfer.amount)
 
-    # Create the transfer record
-    t = Transfer(**transfer.dict())
+    # Create the transfer record; it is owned by the user whose money leaves,
+    # and to_user_id lets the receiving user see it too
+    t = Transfer(**transfer.dict(), user_id=from_acc.user_id, to_user_id=to_acc.user_id)
     db.add_all([from_acc, to_acc, t])
     db.commit()
     db.refresh(t)
+    analytics.record_transfer(t)
     return t
 
 @router.get("/", response_model=list[TransferRead])
-def list_transfers(db: Session = Depends(get_db)):
-    return db.query(Transfer).all()
\ No newline at end of file
+def list_transfers(user_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(Transfer)
+    if user_id is not None:
+        q = q.filter(or_(Transfer.user_id == user_id, Transfer.to_user_id == user_id))
+    return q.all()
\ No newline at end of file
@@ -0,0 +1,232 @@
+# backend/scheduler.py
+import asyncio
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database import engine
+from interest_job import apply_monthly_interest
+from jobs import reconcile_balances, refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "2"))
+# How long shutdown waits for running jobs to finish
+SCHEDULER_SHUTDOWN_TIMEOUT = float(os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT", "30"))
+
+# Standard 5-field cron expressions (minute hour day-of-month month day-of-week)
+INTEREST_JOB_CRON = os.getenv("INTEREST_JOB_CRON", "15 0 * * *")
+ROLLUP_JOB_CRON = os.getenv("ROLLUP_JOB_CRON", "*/15 * * * *")
+RECONCILE_JOB_CRON = os.getenv("RECONCILE_JOB_CRON", "30 3 * * *")
+
+
+class CronSchedule:
+    """
+    Minimal cron matcher supporting *, numbers, lists (1,15), ranges (1-5) and steps (*/15).
+    Unlike classic cron, day-of-month and day-of-week must both match when both are set.
+    Day-of-week uses 0 = Sunday.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expr):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, lo, hi) for part, (lo, hi) in zip(parts, self.FIELDS)
+        )
+
+    @staticmethod
+    def _parse(part, lo, hi):
+        values = set()
+        for item in part.split(","):
+            rng, _, step = item.partition("/")
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start, end = (int(v) for v in rng.split("-"))
+            else:
+                start = end = int(rng)
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field {item!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def next_after(self, moment):
+        """First matching minute strictly after `moment`."""
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 4)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif t.day not in self.days or (t.weekday() + 1) % 7 not in self.weekdays:
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression {self.expr!r} never fires")
+
+
+class Job:
+    def __init__(self, name, schedule, func):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.next_run = schedule.next_after(datetime.now())
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_started = None
+        self.last_duration_s = None
+        self.last_rows = None
+        self.total_rows = 0
+        self.last_error = None
+
+    @property
+    def lock_key(self):
+        # Stable across processes/replicas, unlike hash()
+        return zlib.crc32(f"finance-scheduler:{self.name}".encode())
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "schedule": self.schedule.expr,
+            "next_run": self.next_run,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_locked": self.skipped,
+            "last_started": self.last_started,
+            "last_duration_s": self.last_duration_s,
+            "last_rows_processed": self.last_rows,
+            "total_rows_processed": self.total_rows,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    In-process asyncio scheduler. Jobs are synchronous functions returning the
+    number of rows processed; they run in worker threads against the shared
+    engine, at most `max_concurrency` at a time. On Postgres each run holds a
+    pg_try_advisory_lock so only one replica executes a given job.
+    """
+
+    def __init__(self, engine, max_concurrency=SCHEDULER_MAX_CONCURRENCY):
+        self.engine = engine
+        self.jobs = {}
+        self._semaphore = None
+        self._max_concurrency = max_concurrency
+        self._task = None
+        # Strong references to in-flight job tasks (the event loop only keeps weak ones)
+        self._running = set()
+        self._stats_lock = threading.Lock()
+
+    def add(self, name, cron, func):
+        self.jobs[name] = Job(name, CronSchedule(cron), func)
+
+    def start(self):
+        if self._task is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout=SCHEDULER_SHUTDOWN_TIMEOUT):
+        """Stop scheduling, then wait for running jobs; worker threads can't be interrupted mid-run."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=timeout)
+            if pending:
+                logger.warning("Scheduler stopped with %d job(s) still running after %.0fs", len(pending), timeout)
+                for task in pending:
+                    task.cancel()
+
+    async def _loop(self):
+        while True:
+            now = datetime.now()
+            for job in self.jobs.values():
+                if job.next_run <= now and not job.running:
+                    job.next_run = job.schedule.next_after(now)
+                    job.running = True
+                    task = asyncio.create_task(self._run(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            wake = min((j.next_run for j in self.jobs.values()), default=now + timedelta(minutes=1))
+            await asyncio.sleep(min(max((wake - datetime.now()).total_seconds(), 1), 60))
+
+    async def _run(self, job):
+        try:
+            async with self._semaphore:
+                # Queued behind the semaphore when stop() was called: don't start
+                if self._task is not None:
+                    await asyncio.to_thread(self.run_job, job.name)
+        finally:
+            job.running = False
+
+    def run_job(self, name):
+        """Run a job now (blocking), honouring the cross-replica advisory lock."""
+        job = self.jobs[name]
+        with self.engine.connect() as conn:
+            use_lock = conn.dialect.name == "postgresql"
+            if use_lock:
+                # Session-level lock: it outlives the transaction, so commit rather than sit idle in one
+                acquired = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": job.lock_key}).scalar()
+                conn.commit()
+                if not acquired:
+                    with self._stats_lock:
+                        job.skipped += 1
+                    return None
+            try:
+                return self._execute(job)
+            finally:
+                if use_lock:
+                    conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": job.lock_key})
+                    conn.commit()
+
+    def _execute(self, job):
+        started = time.perf_counter()
+        job.last_started = datetime.now()
+        try:
+            rows = job.func() or 0
+        except Exception as e:
+            logger.exception("Scheduled job %s failed", job.name)
+            with self._stats_lock:
+                job.failures += 1
+                job.last_error = str(e)
+                job.last_duration_s = time.perf_counter() - started
+            return None
+        with self._stats_lock:
+            job.runs += 1
+            job.last_error = None
+            job.last_rows = rows
+            job.total_rows += rows
+            job.last_duration_s = time.perf_counter() - started
+        logger.info("Scheduled job %s processed %d rows in %.2fs", job.name, rows, job.last_duration_s)
+        return rows
+
+    def stats(self):
+        with self._stats_lock:
+            return [job.stats() for job in self.jobs.values()]
+
+
+scheduler = Scheduler(engine)
+scheduler.add("interest", INTEREST_JOB_CRON, apply_monthly_interest)
+scheduler.add("rollups", ROLLUP_JOB_CRON, refresh_rollups)
+scheduler.add("reconciliation", RECONCILE_JOB_CRON, reconcile_balances)
@@ -45,6 +45,7 @@ class PayeeUpdate(BaseModel):
 
 class PayeeRead(BaseModel):
     id: int
+    user_id: Optional[int] = None
     name: str
 
     model_config = ConfigDict(from_attributes=True)
@@ -104,6 +105,7 @@ class DepositUpdate(BaseModel):
 
 class DepositRead(DepositCreate):
     id: int
+    user_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -118,6 +120,8 @@ class TransferCreate(BaseModel):
 
 class TransferRead(TransferCreate):
     id: int
+    user_id: Optional[int] = None
+    to_user_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -139,6 +143,7 @@ class PaymentUpdate(BaseModel):
 
 class PaymentRead(PaymentCreate):
     id: int
+    user_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
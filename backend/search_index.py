@@ -0,0 +1,300 @@
+# backend/search_index.py
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from sqlalchemy import func
+
+from models import Deposit, Payee, PayeeAccount
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixIndex:
+    """
+    In-memory prefix trie plus trigram postings over a set of strings.
+    Used as the search backend when the database has no pg_trgm (e.g. SQLite).
+    Each indexed string maps to a payload dict returned on match.
+
+    Entries are reference counted when `counted` is set (sources: one count
+    per deposit using the string); otherwise adding an existing entry is a
+    no-op. remove() drops an entry once its count reaches zero.
+    """
+
+    def __init__(self, counted=False):
+        self.counted = counted
+        self._root = {}
+        # trigram -> set of slots, plus a lazily built array copy for fuzzy()
+        self._trigrams = {}
+        self._arrays = {}
+        # slot -> [key, payload, trigram count, refs]; None once removed
+        self._entries = []
+        self._slots = {}
+        self._lengths = np.zeros(1024, dtype=np.int32)
+
+    @staticmethod
+    def _identity(key, payload):
+        return key, tuple(sorted(payload.items()))
+
+    def add(self, text, payload, count=1):
+        key = text.lower()
+        identity = self._identity(key, payload)
+        slot = self._slots.get(identity)
+        if slot is not None:
+            if self.counted:
+                self._entries[slot][3] += count
+            return
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        slot = len(self._entries)
+        grams = _trigrams(key)
+        self._entries.append([key, payload, len(grams), count])
+        self._slots[identity] = slot
+        if slot >= len(self._lengths):
+            self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+        self._lengths[slot] = len(grams)
+        node.setdefault(None, []).append(slot)
+        for tri in grams:
+            self._trigrams.setdefault(tri, set()).add(slot)
+            self._arrays.pop(tri, None)
+
+    def remove(self, text, payload):
+        key = text.lower()
+        identity = self._identity(key, payload)
+        slot = self._slots.get(identity)
+        if slot is None:
+            return
+        entry = self._entries[slot]
+        entry[3] -= 1
+        if self.counted and entry[3] > 0:
+            return
+        del self._slots[identity]
+        self._entries[slot] = None
+        path, node = [], self._root
+        for ch in key:
+            path.append((node, ch))
+            node = node[ch]
+        node[None].remove(slot)
+        if not node[None]:
+            del node[None]
+        # Prune branches left empty so prefix walks don't visit them
+        for parent, ch in reversed(path):
+            if parent[ch]:
+                break
+            del parent[ch]
+        for tri in _trigrams(key):
+            postings = self._trigrams[tri]
+            postings.discard(slot)
+            self._arrays.pop(tri, None)
+            if not postings:
+                del self._trigrams[tri]
+
+    def replace(self, old_text, old_payload, text, payload):
+        self.remove(old_text, old_payload)
+        self.add(text, payload)
+
+    def size(self):
+        return len(self._slots)
+
+    def prefix(self, query, limit):
+        node = self._root
+        for ch in query.lower():
+            node = node.get(ch)
+            if node is None:
+                return []
+        # Depth-first in character order, so results come back alphabetically like the SQL path
+        out, stack = [], [node]
+        while stack:
+            n = stack.pop()
+            for slot in n.get(None, ()):
+                out.append(self._entries[slot][1])
+                if len(out) >= limit:
+                    return out
+            stack.extend(n[ch] for ch in sorted((k for k in n if k is not None), reverse=True))
+        return out
+
+    def _postings(self, tri):
+        array = self._arrays.get(tri)
+        if array is None:
+            postings = self._trigrams[tri]
+            array = self._arrays[tri] = np.fromiter(postings, dtype=np.int32, count=len(postings))
+        return array
+
+    def fuzzy(self, query, limit, threshold=0.3):
+        grams = [tri for tri in _trigrams(query.lower())]
+        present = [self._postings(tri) for tri in grams if tri in self._trigrams]
+        if not present:
+            return []
+        # Shared-trigram counts for every entry in one bincount over the query's postings
+        shared = np.bincount(np.concatenate(present))
+        # Jaccard >= threshold needs at least threshold * len(grams) shared trigrams;
+        # that prefilter leaves a small candidate set to score
+        need = max(1, math.ceil(threshold * len(grams)))
+        candidates = np.flatnonzero(shared >= need)
+        common = shared[candidates]
+        scores = common / (len(grams) + self._lengths[candidates] - common)
+        keep = scores >= threshold
+        candidates, scores = candidates[keep], scores[keep]
+        if candidates.size > limit:
+            # Keep everything tied with the limit-th best score so ties still sort by name
+            cutoff = np.partition(scores, -limit)[-limit]
+            keep = scores >= cutoff
+            candidates, scores = candidates[keep], scores[keep]
+        entries = self._entries
+        ranked = sorted(zip(scores.tolist(), candidates.tolist()), key=lambda s: (-s[0], entries[s[1]][0]))
+        return [entries[slot][1] for _, slot in ranked[:limit]]
+
+
+def _build_payees(db, user_id):
+    index = PrefixIndex()
+    q = db.query(Payee.id, Payee.name)
+    if user_id is not None:
+        q = q.filter(Payee.user_id == user_id)
+    for pid, name in q.yield_per(5000):
+        index.add(name, {"id": pid, "name": name})
+    return index
+
+
+def _build_sources(db, user_id):
+    # Counted: a source stays suggestible until its last deposit is removed
+    index = PrefixIndex(counted=True)
+    q = db.query(Deposit.source, func.count(Deposit.id))
+    if user_id is not None:
+        q = q.filter(Deposit.user_id == user_id)
+    for source, n in q.group_by(Deposit.source).yield_per(5000):
+        index.add(source, {"source": source}, n)
+    return index
+
+
+def _build_payee_accounts(db, user_id):
+    index = PrefixIndex()
+    q = db.query(PayeeAccount.id, PayeeAccount.payee_id, PayeeAccount.account_label, PayeeAccount.category)
+    if user_id is not None:
+        q = q.join(Payee).filter(Payee.user_id == user_id)
+    for pa_id, payee_id, label, category in q.yield_per(5000):
+        index.add(label, {"id": pa_id, "payee_id": payee_id, "account_label": label, "category": category})
+    return index
+
+
+_BUILDERS = {
+    "payees": _build_payees,
+    "sources": _build_sources,
+    "payee_accounts": _build_payee_accounts,
+}
+
+# Upper bound on per-user indexes kept (across all names); least recently searched are dropped first
+SEARCH_INDEX_MAX_USER_INDEXES = int(os.getenv("SEARCH_INDEX_MAX_USER_INDEXES", "300"))
+
+# Keyed by (name, user_id); user_id None is the unscoped index over all users,
+# which is always kept. _lock guards these dicts and index mutation and is
+# never held while building.
+_indexes = OrderedDict()
+_lock = threading.Lock()
+# Builds run outside _lock, one at a time per key; deltas that arrive meanwhile
+# are queued in _pending and replayed onto the new index before it is swapped in.
+# A delta that raced the build's SELECT may be applied twice; the scheduled
+# rollup rebuild repairs such drift.
+_build_locks = {}
+_pending = {}
+
+
+def _build(db, key, reuse):
+    with _lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    # Concurrent callers for the same key wait here instead of building twice
+    with build_lock:
+        with _lock:
+            index = _indexes.get(key)
+            if reuse and index is not None:
+                return index
+            _pending[key] = []
+        try:
+            index = _BUILDERS[key[0]](db, key[1])
+        except Exception:
+            with _lock:
+                _pending.pop(key, None)
+            raise
+        with _lock:
+            pending = _pending.pop(key, None)
+            # None: invalidate() ran during the build, so serve this result once but don't keep it
+            if pending is not None:
+                for apply in pending:
+                    apply(index)
+                _indexes[key] = index
+                if key[1] is not None:
+                    _evict_user_indexes()
+            if _build_locks.get(key) is build_lock:
+                del _build_locks[key]
+        return index
+
+
+def _evict_user_indexes():
+    scoped = [key for key in _indexes if key[1] is not None]
+    for key in scoped[:len(scoped) - SEARCH_INDEX_MAX_USER_INDEXES]:
+        del _indexes[key]
+
+
+def get_index(db, name, user_id=None):
+    """Return the named index, building it (outside the global lock) if needed."""
+    key = (name, user_id)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+    return index if index is not None else _build(db, key, reuse=True)
+
+
+def search(db, name, query, limit, user_id=None, fuzzy=False, threshold=0.3):
+    index = get_index(db, name, user_id)
+    # Searches are sub-millisecond; holding _lock keeps them off entries a writer is removing
+    with _lock:
+        return index.fuzzy(query, limit, threshold) if fuzzy else index.prefix(query, limit)
+
+
+def rebuild(db, name, user_id=None):
+    """Build a fresh index and swap it in; the old one keeps serving until then."""
+    return _build(db, (name, user_id), reuse=False)
+
+
+def _apply(name, user_id, apply):
+    with _lock:
+        for key in {(name, None), (name, user_id)}:
+            index = _indexes.get(key)
+            if index is not None:
+                apply(index)
+            pending = _pending.get(key)
+            if pending is not None:
+                pending.append(apply)
+
+
+def add(name, text, payload, user_id=None):
+    """Add an entry (or a reference to it) to built indexes; unbuilt ones pick it up on build."""
+    _apply(name, user_id, lambda index: index.add(text, payload))
+
+
+def remove(name, text, payload, user_id=None):
+    _apply(name, user_id, lambda index: index.remove(text, payload))
+
+
+def replace(name, old_text, old_payload, text, payload, old_user_id=None, user_id=None):
+    if old_user_id == user_id:
+        _apply(name, user_id, lambda index: index.replace(old_text, old_payload, text, payload))
+    else:
+        remove(name, old_text, old_payload, old_user_id)
+        add(name, text, payload, user_id)
+
+
+def invalidate(name, scoped_only=False):
+    """Drop indexes with this name (only per-user ones if scoped_only); they are rebuilt lazily."""
+    with _lock:
+        for key in [k for k in _indexes if k[0] == name and not (scoped_only and k[1] is None)]:
+            del _indexes[key]
+        for key in [k for k in _pending if k[0] == name and not (scoped_only and k[1] is None)]:
+            _pending[key] = None
@@ -0,0 +1,58 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# The app reads these at import time; never let tests reach a real database
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["ANALYTICS_MODE"] = "columnar"
+os.environ["SCHEDULER_ENABLED"] = "0"
+os.environ.pop("WEB_CONCURRENCY", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+import database
+import models
+from main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app against a seeded SQLite database shared by every test module."""
+    today = date.today()
+    last_month = today.replace(day=1) - timedelta(days=1)
+    models.Base.metadata.create_all(database.engine)
+    with Session(database.engine) as s:
+        s.add_all([models.User(id=u, name=f"user {u}", email=f"u{u}@example.com") for u in (1, 2)])
+        s.add_all([
+            models.Account(id=1, user_id=1, type="checking", nickname="one", balance=5000),
+            models.Account(id=2, user_id=2, type="checking", nickname="two", balance=5000),
+            models.Account(id=3, user_id=1, type="savings", nickname="three", balance=0),
+        ])
+        s.add_all([models.Payee(id=1, user_id=1, name="Chase"), models.Payee(id=2, user_id=2, name="Ally")])
+        s.add_all([
+            models.PayeeAccount(id=1, payee_id=1, account_label="Visa", category="credit card",
+                                interest_type="compound", interest_rate=0.2, current_balance=300,
+                                principal_balance=250, accrued_interest=0, last_interest_calc=last_month),
+            models.PayeeAccount(id=2, payee_id=2, account_label="Car", category="loan",
+                                interest_type="loan", interest_rate=0.06, current_balance=9000,
+                                principal_balance=9000, accrued_interest=0, last_interest_calc=last_month),
+        ])
+        s.add_all([
+            models.Deposit(account_id=1 + i % 2, user_id=1 + i % 2, source=f"Payroll {i % 3}",
+                           amount=100 + i, date=today - timedelta(days=7 * i))
+            for i in range(20)
+        ])
+        s.add_all([
+            models.Payment(checking_account_id=1 + i % 2, payee_account_id=1 + i % 2, user_id=1 + i % 2,
+                           amount=25 + i, date=today - timedelta(days=5 * i))
+            for i in range(10)
+        ])
+        s.commit()
+    with TestClient(app) as c:
+        yield c
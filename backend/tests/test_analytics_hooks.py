@@ -0,0 +1,149 @@
+# tests/test_analytics_hooks.py
+"""
+Every mutating endpoint (and the scheduled jobs) must keep the columnar store
+in step with the database: after each write the columnar reports have to
+match the SQL reports exactly.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import analytics
+import database
+import interest_job
+import jobs
+import models
+
+TODAY = date.today()
+REPORTS = [
+    "/reports/deposits-by-source",
+    "/reports/deposits-by-source?user_id=1",
+    f"/reports/deposits-by-source?account_id=1&start_date={TODAY - timedelta(days=10)}",
+    "/reports/payees-balances-summary",
+    "/reports/payees-balances-summary?user_id=2",
+    "/reports/payments-history",
+    "/reports/payments-history?user_id=1&payee_account_id=1",
+    "/reports/cashflow-monthly",
+    f"/reports/cashflow-monthly?year={TODAY.year}&user_id=2",
+]
+TABLES = {
+    "deposits": models.Deposit,
+    "payments": models.Payment,
+    "transfers": models.Transfer,
+    "payee_accounts": models.PayeeAccount,
+}
+
+
+def assert_in_sync(client, monkeypatch):
+    columnar = {path: client.get(path).json() for path in REPORTS}
+    assert analytics.store.loaded
+    with monkeypatch.context() as m:
+        m.setattr(analytics, "ANALYTICS_MODE", "sql")
+        sql = {path: client.get(path).json() for path in REPORTS}
+    assert columnar == sql
+    tables = analytics.store.stats()["tables"]
+    with Session(database.engine) as s:
+        for name, model in TABLES.items():
+            assert tables[name]["rows"] == s.execute(select(func.count(model.id))).scalar(), name
+
+
+def ok(response):
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_writes_keep_columnar_reports_in_sync(client, monkeypatch):
+    assert_in_sync(client, monkeypatch)
+
+    # Deposits
+    dep = ok(client.post("/deposits/", json={"account_id": 1, "source": "Bonus", "amount": "250.50", "date": str(TODAY)}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.put(f"/deposits/{dep['id']}", json={"amount": "300", "source": "Payroll 1"}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.put(f"/deposits/{dep['id']}", json={"account_id": 2}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.delete(f"/deposits/{dep['id']}"))
+    assert_in_sync(client, monkeypatch)
+
+    # Payments
+    pay = ok(client.post("/payments/", json={"checking_account_id": 1, "payee_account_id": 1, "amount": "40", "date": str(TODAY)}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.put(f"/payments/{pay['id']}", json={"checking_account_id": 2, "payee_account_id": 2, "amount": "45"}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.delete(f"/payments/{pay['id']}"))
+    assert_in_sync(client, monkeypatch)
+
+    # Transfers, including one between users
+    ok(client.post("/transfers/", json={"from_account_id": 1, "to_account_id": 3, "amount": "10", "date": str(TODAY)}))
+    ok(client.post("/transfers/", json={"from_account_id": 1, "to_account_id": 2, "amount": "20", "date": str(TODAY)}))
+    assert_in_sync(client, monkeypatch)
+
+    # Payees
+    payee = ok(client.post("/payees/", json={"user_id": 2, "name": "Comcast"}))
+    renamed = ok(client.put(f"/payees/{payee['id']}", json={"name": "Xfinity"}))
+    assert renamed["name"] == "Xfinity"
+    assert_in_sync(client, monkeypatch)
+
+    # Payee accounts
+    pa = ok(client.post("/payee-accounts/", json={"payee_id": payee["id"], "account_label": "Internet",
+                                                  "category": "utilities", "current_balance": 80}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.put(f"/payee-accounts/{pa['id']}", json={"current_balance": 95.25, "category": "cable"}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.put(f"/payee-accounts/{pa['id']}", json={"payee_id": 1}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.delete(f"/payee-accounts/{pa['id']}"))
+    ok(client.delete(f"/payees/{payee['id']}"))
+    assert_in_sync(client, monkeypatch)
+
+    # Accounts: an owner change moves the account's transactions between users
+    acct = ok(client.post("/accounts/", json={"user_id": 1, "type": "checking", "nickname": "spare", "balance": 0}))
+    ok(client.put("/accounts/3", json={"user_id": 2}))
+    assert_in_sync(client, monkeypatch)
+    ok(client.delete(f"/accounts/{acct['id']}"))
+    assert_in_sync(client, monkeypatch)
+
+    # Scheduled jobs rewrite payee account balances
+    assert interest_job.apply_monthly_interest() > 0
+    assert_in_sync(client, monkeypatch)
+    with Session(database.engine) as s:
+        s.get(models.PayeeAccount, 2).current_balance = 1
+        s.commit()
+    assert jobs.reconcile_balances() == 1
+    assert_in_sync(client, monkeypatch)
+
+
+def test_load_does_not_block_writes(client, monkeypatch):
+    load = analytics.store._load_tables
+
+    def slow_load(*args):
+        time.sleep(1.0)
+        load(*args)
+
+    monkeypatch.setattr(analytics.store, "_load_tables", slow_load)
+    analytics.invalidate()
+    reader = threading.Thread(target=lambda: client.get("/reports/deposits-by-source"))
+    reader.start()
+    time.sleep(0.2)
+
+    started = time.perf_counter()
+    ok(client.post("/deposits/", json={"account_id": 1, "source": "During load", "amount": "5", "date": str(TODAY)}))
+    assert time.perf_counter() - started < 0.5
+    assert analytics.store.stats()["loading"]
+    reader.join()
+
+    monkeypatch.setattr(analytics.store, "_load_tables", load)
+    assert "During load" in {row["source"] for row in client.get("/reports/deposits-by-source").json()}
+    assert_in_sync(client, monkeypatch)
+
+
+def test_columnar_mode_rejects_multiple_workers(monkeypatch):
+    monkeypatch.setattr(analytics, "_claim", None)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(RuntimeError, match="single API process"):
+        analytics.claim(database.engine)
+    assert not analytics.enabled()
@@ -0,0 +1,103 @@
+# tests/test_forecast.py
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import forecast
+import models
+
+TODAY = date(2026, 1, 10)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add(models.User(id=1, name="user", email="user@example.com"))
+        s.add_all([
+            models.Account(id=1, user_id=1, type="checking", nickname="checking", balance=100),
+            models.Account(id=2, user_id=1, type="savings", nickname="savings", balance=5000),
+        ])
+        s.add(models.Payee(id=1, user_id=1, name="Payee"))
+        s.flush()
+        yield s
+
+
+def deposits(db, source, amount, days_ago, account_id=1):
+    db.add_all([
+        models.Deposit(account_id=account_id, user_id=1, source=source, amount=amount, date=TODAY - timedelta(days=d))
+        for d in days_ago
+    ])
+
+
+def bill(db, pa_id, interest_type, balance, due_date, paid=(), paid_from=1):
+    db.add(models.PayeeAccount(id=pa_id, payee_id=1, account_label=f"bill {pa_id}", category="bills",
+                               interest_type=interest_type, current_balance=balance, due_date=due_date))
+    db.add_all([
+        models.Payment(checking_account_id=paid_from, payee_account_id=pa_id, user_id=1, amount=amount, date=day)
+        for day, amount in paid
+    ])
+
+
+def test_add_months_clamps_to_month_end():
+    assert forecast._add_months(date(2026, 1, 31), 1, 31) == date(2026, 2, 28)
+    assert forecast._add_months(date(2024, 1, 31), 1, 31) == date(2024, 2, 29)
+    assert forecast._add_months(date(2026, 3, 31), -1, 31) == date(2026, 2, 28)
+    assert forecast._add_months(date(2025, 12, 15), 1, 15) == date(2026, 1, 15)
+
+
+def test_monthly_offsets_clamp_and_start_at_anchor():
+    # The 31st falls on Jan 31, Feb 28 and Mar 31
+    offsets = forecast._monthly_offsets(date(2026, 1, 20), date(2025, 12, 31), 70, include_today=False)
+    assert offsets.tolist() == [11, 39, 70]
+    # A future anchor is the first occurrence
+    offsets = forecast._monthly_offsets(date(2026, 1, 20), date(2026, 2, 5), 60, include_today=True)
+    assert offsets.tolist() == [16, 44]
+
+
+def test_stopped_deposit_stream_is_not_projected(db):
+    # Biweekly paychecks that stopped 120 days ago
+    deposits(db, "OldCo", 1000, [120 + 14 * k for k in range(4)])
+    out = forecast.project(db, 60, today=TODAY)
+    assert out["recurring_deposits"] == []
+    assert out["accounts"][0]["ending_balance"] == 100
+
+
+def test_every_gap_must_match_the_cadence(db):
+    # Average gap 14 days, but one gap of 1 day and one of 27
+    deposits(db, "Odd", 500, [28, 27, 0])
+    deposits(db, "Payroll", 800, [30, 16, 2])
+    recurring = forecast.detect_recurring_deposits(db, TODAY)
+    assert [(r["source"], r["cadence_days"]) for r in recurring] == [("Payroll", 14)]
+
+
+def test_bills_fall_back_to_the_default_checking_account(db):
+    # Last paid from savings, which is not projected: charged to the owner's checking account
+    bill(db, 1, "pif", 60, date(2026, 1, 15), paid=[(date(2025, 12, 15), 60)], paid_from=2)
+    out = forecast.project(db, 10, today=TODAY, include_series=True)
+    series = out["accounts"][0]["series"]
+    assert series[4] == 100 and series[5] == 40
+
+
+def test_amortized_balances_are_not_charged_in_full(db):
+    bill(db, 1, "loan", 9800, date(2026, 1, 15))
+    bill(db, 2, "compound", 1000, date(2026, 1, 20), paid=[(date(2025, 12, 20), 35)])
+    bill(db, 3, "none", 50, date(2026, 1, 12))
+    out = forecast.project(db, 15, today=TODAY)
+    # The loan has no payment to go by, the card is charged its usual payment, the utility in full
+    assert out["accounts"][0]["ending_balance"] == 100 - 35 - 50
+    assert out["accounts"][0]["goes_negative_on"] == []
+
+
+def test_goes_negative_on_lists_each_crossing(db):
+    deposits(db, "Payroll", 100, [36, 22, 8])  # next on Jan 16, then every 14 days
+    bill(db, 1, "pif", 300, date(2026, 1, 15), paid=[(date(2025, 12, 15), 300)])
+    account = forecast.project(db, 60, today=TODAY)["accounts"][0]
+    # Jan 15: -200, back to 0 on Jan 30, Feb 15: -200 again
+    assert account["goes_negative_on"] == [date(2026, 1, 15), date(2026, 2, 15)]
+    assert (account["min_balance"], account["min_balance_date"]) == (-200, date(2026, 1, 15))
+    assert account["negative_days"] == 15 + 25
@@ -0,0 +1,24 @@
+# tests/test_interest_job.py
+from sqlalchemy.orm import Session
+
+import database
+import interest_job
+import models
+
+
+def ok(response):
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_new_accounts_are_first_charged_next_month(client):
+    pif = ok(client.post("/payee-accounts/", json={"payee_id": 1, "account_label": "Store card", "category": "credit card",
+                                                  "interest_type": "pif", "current_balance": 120}))
+    loan = ok(client.post("/payee-accounts/", json={"payee_id": 1, "account_label": "Boat", "category": "loan",
+                                                   "interest_type": "loan", "interest_rate": 0.12,
+                                                   "current_balance": 1000, "principal_balance": 1000}))
+    interest_job.apply_monthly_interest()
+
+    with Session(database.engine) as s:
+        assert s.get(models.PayeeAccount, pif["id"]).current_balance == 120
+        assert s.get(models.PayeeAccount, loan["id"]).current_balance == 1000
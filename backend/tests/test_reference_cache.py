@@ -0,0 +1,57 @@
+# tests/test_reference_cache.py
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+import cache
+import database
+
+
+def ok(response):
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_payments_history_keeps_its_shape(client):
+    rows = ok(client.get("/reports/payments-history?payee_account_id=1"))
+    assert rows
+    assert {tuple(sorted(r)) for r in rows} == {
+        ("amount", "checking_account_id", "date", "id", "payee_account_id"),
+    }
+
+
+def test_write_paths_check_references_through_the_cache(client):
+    payment = {"checking_account_id": 1, "payee_account_id": 1, "amount": "12", "date": str(date.today())}
+    ok(client.post("/payments/", json=payment))
+    before = cache.payee_accounts.stats()
+    ok(client.post("/payments/", json=payment))
+    after = cache.payee_accounts.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"] + 1, before["misses"])
+
+    assert client.post("/payments/", json={**payment, "payee_account_id": 999}).status_code == 404
+    assert client.post("/payee-accounts/", json={"payee_id": 999, "account_label": "Nope",
+                                                 "category": "utilities"}).status_code == 404
+
+    # A rename is visible to the next lookup
+    payee = ok(client.post("/payees/", json={"user_id": 1, "name": "Old name"}))
+    ok(client.put(f"/payees/{payee['id']}", json={"name": "New name"}))
+    ok(client.post("/payee-accounts/", json={"payee_id": payee["id"], "account_label": "Card",
+                                             "category": "credit card"}))
+    with Session(database.engine) as s:
+        assert cache.payees.get(s, payee["id"])["name"] == "New name"
+
+
+def test_delete_payee_with_accounts_is_rejected(client):
+    payee = ok(client.post("/payees/", json={"user_id": 2, "name": "Utility Co"}))
+    pa = ok(client.post("/payee-accounts/", json={"payee_id": payee["id"], "account_label": "Water",
+                                                  "category": "utilities"}))
+
+    response = client.delete(f"/payees/{payee['id']}")
+    assert response.status_code == 409, response.text
+    assert any(a["id"] == pa["id"] for a in ok(client.get("/payee-accounts/?user_id=2")))
+    assert any(p["id"] == payee["id"] for p in ok(client.get("/payees/?user_id=2")))
+
+    ok(client.delete(f"/payee-accounts/{pa['id']}"))
+    ok(client.delete(f"/payees/{payee['id']}"))
+    with Session(database.engine) as s:
+        assert cache.payees.get(s, payee["id"]) is None
@@ -0,0 +1,71 @@
+# tests/test_search.py
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import database
+import models
+from routers import search
+
+
+def ok(response):
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def deposit_sources():
+    with Session(database.engine) as s:
+        table = set(s.execute(select(
+            models.DepositSource.user_id, models.DepositSource.source, models.DepositSource.deposit_count
+        )).all())
+        grouped = set(s.execute(select(
+            models.Deposit.user_id, models.Deposit.source, func.count(models.Deposit.id)
+        ).group_by(models.Deposit.user_id, models.Deposit.source)).all())
+    assert table == grouped
+    return table
+
+
+def test_deposit_sources_follow_every_write(client):
+    with Session(database.engine) as s:
+        # Rows seeded without the handlers
+        s.execute(models.DepositSource.__table__.delete())
+        s.execute(models.DepositSource.__table__.insert().from_select(
+            ["user_id", "source", "deposit_count"],
+            select(models.Deposit.user_id, models.Deposit.source, func.count(models.Deposit.id))
+            .group_by(models.Deposit.user_id, models.Deposit.source),
+        ))
+        s.commit()
+    today = str(date.today())
+
+    dep = ok(client.post("/deposits/", json={"account_id": 1, "source": "Freelance", "amount": "50", "date": today}))
+    ok(client.post("/deposits/", json={"account_id": 1, "source": "Freelance", "amount": "60", "date": today}))
+    assert (1, "Freelance", 2) in deposit_sources()
+
+    ok(client.put(f"/deposits/{dep['id']}", json={"source": "Consulting"}))
+    ok(client.put(f"/deposits/{dep['id']}", json={"account_id": 2}))
+    assert {(1, "Freelance", 1), (2, "Consulting", 1)} <= deposit_sources()
+
+    account = ok(client.post("/accounts/", json={"user_id": 1, "type": "checking", "nickname": "side", "balance": 0}))
+    ok(client.post("/deposits/", json={"account_id": account["id"], "source": "Freelance", "amount": "5", "date": today}))
+    ok(client.put(f"/accounts/{account['id']}", json={"user_id": 2}))
+    assert {(1, "Freelance", 1), (2, "Freelance", 1)} <= deposit_sources()
+
+    ok(client.delete(f"/deposits/{dep['id']}"))
+    assert not any(source == "Consulting" for _, source, _ in deposit_sources())
+
+
+def test_sql_source_search_reads_deposit_sources(client, monkeypatch):
+    today = str(date.today())
+    for source in ("Payroll Acme", "payroll beta", "Pension"):
+        ok(client.post("/deposits/", json={"account_id": 2, "source": source, "amount": "10", "date": today}))
+    # The prefix path is plain SQL, so it also runs on SQLite
+    monkeypatch.setattr(search, "_use_trigram_indexes", lambda db: True)
+
+    assert ok(client.get("/search/sources?q=payroll&user_id=2")) == [
+        {"source": s} for s in ("Payroll 0", "Payroll 1", "Payroll 2", "Payroll Acme", "payroll beta")
+    ]
+    assert ok(client.get("/search/sources?q=pe")) == [{"source": "Pension"}]
+    assert ok(client.get("/search/sources?q=Payroll&limit=2")) == [
+        {"source": "Payroll 0"}, {"source": "Payroll 1"},
+    ]
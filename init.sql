@@ -1,5 +1,6 @@
 -- Create database schema for finance tracker
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Users table
 CREATE TABLE users (
@@ -45,6 +46,7 @@ CREATE TABLE payee_accounts (
     principal_balance DECIMAL(12, 2) DEFAULT 0.00,
     accrued_interest DECIMAL(12, 2) DEFAULT 0.00,
     due_date DATE,
+    last_interest_calc DATE DEFAULT CURRENT_DATE, -- month already charged by interest_job
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -53,6 +55,7 @@ CREATE TABLE payee_accounts (
 CREATE TABLE deposits (
     id SERIAL PRIMARY KEY,
     account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE, -- denormalized from accounts.user_id
     source VARCHAR(255) NOT NULL,
     amount DECIMAL(12, 2) NOT NULL CHECK (amount > 0),
     date DATE NOT NULL,
@@ -60,11 +63,22 @@ CREATE TABLE deposits (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Distinct deposit sources per user, maintained by the deposit and account handlers
+-- (search suggestions read this instead of grouping all deposits)
+CREATE TABLE deposit_sources (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    source VARCHAR(255) NOT NULL,
+    deposit_count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, source)
+);
+
 -- Transfers table
 CREATE TABLE transfers (
     id SERIAL PRIMARY KEY,
     from_account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
     to_account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE, -- owner of from_account_id
+    to_user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE, -- owner of to_account_id
     amount DECIMAL(12, 2) NOT NULL CHECK (amount > 0),
     date DATE NOT NULL,
     description TEXT,
@@ -77,6 +91,7 @@ CREATE TABLE payments (
     id SERIAL PRIMARY KEY,
     checking_account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
     payee_account_id INTEGER NOT NULL REFERENCES payee_accounts(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE, -- owner of checking_account_id
     amount DECIMAL(12, 2) NOT NULL CHECK (amount > 0),
     date DATE NOT NULL,
     principal_applied DECIMAL(12, 2) DEFAULT 0.00,
@@ -98,6 +113,21 @@ CREATE INDEX idx_payments_checking_account ON payments(checking_account_id);
 CREATE INDEX idx_payments_payee_account ON payments(payee_account_id);
 CREATE INDEX idx_payments_date ON payments(date);
 
+-- Per-user scoping: every user-filtered list/report is an index range scan
+CREATE INDEX idx_deposits_user_date_id ON deposits(user_id, date, id);
+CREATE INDEX idx_payments_user_date_id ON payments(user_id, date, id);
+CREATE INDEX idx_transfers_user_date_id ON transfers(user_id, date, id);
+CREATE INDEX idx_transfers_to_user_date_id ON transfers(to_user_id, date, id);
+
+-- Search/autocomplete: prefix (lower(col) LIKE 'q%') and fuzzy (pg_trgm %) lookups
+CREATE INDEX idx_payees_name_prefix ON payees(lower(name) text_pattern_ops);
+CREATE INDEX idx_payees_name_trgm ON payees USING gin (name gin_trgm_ops);
+CREATE INDEX idx_payee_accounts_label_prefix ON payee_accounts(lower(account_label) text_pattern_ops);
+CREATE INDEX idx_payee_accounts_label_trgm ON payee_accounts USING gin (account_label gin_trgm_ops);
+CREATE INDEX idx_deposit_sources_prefix ON deposit_sources(lower(source) text_pattern_ops);
+CREATE INDEX idx_deposit_sources_user_prefix ON deposit_sources(user_id, lower(source) text_pattern_ops);
+CREATE INDEX idx_deposit_sources_trgm ON deposit_sources USING gin (source gin_trgm_ops);
+
 -- Insert sample user for development
 INSERT INTO users (email, hashed_password, full_name) VALUES 
 ('finance_user', '$2b$12$dummy_hash_for_demo', 'Test User');
@@ -0,0 +1,48 @@
+-- Add a denormalized user_id to deposits, payments and transfers and backfill it
+-- from the owning account, so per-user queries no longer join through accounts.
+--
+-- Run with psql in autocommit mode (the default); the backfill commits per batch
+-- so large tables are not locked in a single transaction:
+--   psql "$DATABASE_URL" -f migrations/001_denormalize_user_id.sql
+
+ALTER TABLE deposits ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE;
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE;
+ALTER TABLE transfers ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE;
+
+-- Walk each table in primary-key ranges so every batch is an index range scan
+DO $$
+DECLARE
+    batch_size CONSTANT BIGINT := 50000;
+    specs TEXT[][] := ARRAY[
+        ['deposits', 'account_id'],
+        ['payments', 'checking_account_id'],
+        ['transfers', 'from_account_id']
+    ];
+    spec TEXT[];
+    lo BIGINT;
+    hi BIGINT;
+BEGIN
+    FOREACH spec SLICE 1 IN ARRAY specs LOOP
+        EXECUTE format('SELECT min(id), max(id) FROM %I', spec[1]) INTO lo, hi;
+        WHILE lo <= hi LOOP
+            EXECUTE format(
+                'UPDATE %I t SET user_id = a.user_id FROM accounts a '
+                'WHERE a.id = t.%I AND t.id >= $1 AND t.id < $2 AND t.user_id IS NULL',
+                spec[1], spec[2]
+            ) USING lo, lo + batch_size;
+            COMMIT;
+            lo := lo + batch_size;
+        END LOOP;
+    END LOOP;
+END $$;
+
+ALTER TABLE deposits ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE payments ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE transfers ALTER COLUMN user_id SET NOT NULL;
+
+-- payees.user_id already references users in init.sql; make sure the index exists
+CREATE INDEX IF NOT EXISTS idx_payees_user_id ON payees(user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deposits_user_date_id ON deposits(user_id, date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payments_user_date_id ON payments(user_id, date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transfers_user_date_id ON transfers(user_id, date, id);
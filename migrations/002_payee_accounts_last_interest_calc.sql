@@ -0,0 +1,14 @@
+-- interest_job records the month it last charged each payee account so a
+-- rerun in the same month is a no-op. The column exists in models.py but was
+-- missing from init.sql, so both scheduled jobs failed on Postgres.
+--   psql "$DATABASE_URL" -f migrations/002_payee_accounts_last_interest_calc.sql
+
+ALTER TABLE payee_accounts ADD COLUMN IF NOT EXISTS last_interest_calc DATE;
+ALTER TABLE payee_accounts ALTER COLUMN last_interest_calc SET DEFAULT CURRENT_DATE;
+
+-- The job has never run against these rows and their balances were entered by
+-- hand, possibly including this month's interest. Mark them as charged for the
+-- current month so the first scheduled run after deploy neither zeroes pif
+-- balances nor adds a month of interest; charging starts next month.
+UPDATE payee_accounts SET last_interest_calc = date_trunc('month', current_date)::date
+WHERE last_interest_calc IS NULL;
@@ -0,0 +1,28 @@
+-- Add the receiving account's owner to transfers. transfers.user_id is the
+-- sender, so user-scoped queries filtering incoming transfers on it dropped
+-- every transfer arriving from another user's account.
+--
+-- Run with psql in autocommit mode (the default); the backfill commits per batch:
+--   psql "$DATABASE_URL" -f migrations/003_transfers_to_user_id.sql
+
+ALTER TABLE transfers ADD COLUMN IF NOT EXISTS to_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE;
+
+-- Same primary-key range walk as 001
+DO $$
+DECLARE
+    batch_size CONSTANT BIGINT := 50000;
+    lo BIGINT;
+    hi BIGINT;
+BEGIN
+    SELECT min(id), max(id) FROM transfers INTO lo, hi;
+    WHILE lo <= hi LOOP
+        UPDATE transfers t SET to_user_id = a.user_id FROM accounts a
+        WHERE a.id = t.to_account_id AND t.id >= lo AND t.id < lo + batch_size AND t.to_user_id IS NULL;
+        COMMIT;
+        lo := lo + batch_size;
+    END LOOP;
+END $$;
+
+ALTER TABLE transfers ALTER COLUMN to_user_id SET NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transfers_to_user_date_id ON transfers(to_user_id, date, id);
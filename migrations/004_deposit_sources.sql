@@ -0,0 +1,28 @@
+-- Source suggestions searched deposits directly with GROUP BY source ... LIMIT,
+-- which has to aggregate every matching deposit before it can sort. They now
+-- read deposit_sources, one row per (user, source), which the deposit and
+-- account handlers keep up to date.
+--
+-- Apply together with the release that maintains the table: deposits written by
+-- the previous release after the backfill are not counted. Rerunning the
+-- INSERT below recounts every pair.
+--   psql "$DATABASE_URL" -f migrations/004_deposit_sources.sql
+
+CREATE TABLE IF NOT EXISTS deposit_sources (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    source VARCHAR(255) NOT NULL,
+    deposit_count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, source)
+);
+
+INSERT INTO deposit_sources (user_id, source, deposit_count)
+SELECT user_id, source, count(*) FROM deposits GROUP BY user_id, source
+ON CONFLICT (user_id, source) DO UPDATE SET deposit_count = EXCLUDED.deposit_count;
+
+CREATE INDEX IF NOT EXISTS idx_deposit_sources_prefix ON deposit_sources(lower(source) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_deposit_sources_user_prefix ON deposit_sources(user_id, lower(source) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_deposit_sources_trgm ON deposit_sources USING gin (source gin_trgm_ops);
+
+-- Only the old source search used these
+DROP INDEX CONCURRENTLY IF EXISTS idx_deposits_source_prefix;
+DROP INDEX CONCURRENTLY IF EXISTS idx_deposits_source_trgm;